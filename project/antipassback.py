@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import deque
+
+
+class AntiPassback:
+    """Detects a pass being scanned again shortly after a valid scan.
+
+    Recent valid scans live in a time-bucketed expiry wheel: each bucket holds
+    the reg_nos first seen during one tick, and advancing the wheel clears the
+    buckets that fell out of the window. Every scan is O(1) amortised and memory
+    is bounded by the number of passes scanned within the window (and by
+    max_entries). State is per process; with several workers, route a gate's
+    scanners to the same worker or accept per-worker detection.
+    """
+
+    def __init__(self, window_seconds, gate_window_seconds=None, bucket_seconds=60,
+                 max_entries=100000):
+        self.window_seconds = window_seconds
+        self.gate_window_seconds = max(gate_window_seconds or 0, window_seconds)
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self._slot_count = int(self.gate_window_seconds // bucket_seconds) + 2
+        self._slots = [deque() for _ in range(self._slot_count)]
+        self._last_seen = {}  # reg_no -> (scanned_at, gate, tick)
+        self._tick = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._last_seen)
+
+    def _clear_slot(self, tick):
+        slot = self._slots[tick % self._slot_count]
+        for reg_no in slot:
+            entry = self._last_seen.get(reg_no)
+            # A reg_no scanned again later is listed in a newer slot as well
+            if entry is not None and entry[2] <= tick:
+                del self._last_seen[reg_no]
+        slot.clear()
+
+    def _advance(self, tick):
+        if self._tick is None:
+            self._tick = tick
+            return
+        # Only the slots that are about to be reused need clearing
+        first = max(self._tick + 1, tick - self._slot_count + 1)
+        for expired in range(first, tick + 1):
+            self._clear_slot(expired - self._slot_count)
+        self._tick = max(self._tick, tick)
+
+    def _evict_oldest(self):
+        """Drop the single oldest scan, leaving newer scans in the same bucket in place"""
+        for tick in range(self._tick - self._slot_count + 1, self._tick + 1):
+            slot = self._slots[tick % self._slot_count]
+            while slot:
+                reg_no = slot.popleft()
+                entry = self._last_seen.get(reg_no)
+                # Skip listings left behind by a reg_no that was scanned again later
+                if entry is not None and entry[2] <= tick:
+                    del self._last_seen[reg_no]
+                    return
+
+    def check(self, reg_no, gate=None, now=None):
+        """Record a valid scan, or return the earlier scan it duplicates.
+
+        Returns None when the scan is accepted. Otherwise returns a
+        (seconds_since_last_scan, last_gate) tuple and leaves the original
+        scan in place, so repeated attempts do not extend the window.
+        """
+        now = time.time() if now is None else now
+        tick = int(now // self.bucket_seconds)
+        with self._lock:
+            self._advance(tick)
+
+            previous = self._last_seen.get(reg_no)
+            if previous is not None:
+                elapsed = now - previous[0]
+                other_gate = gate is not None and previous[1] is not None and gate != previous[1]
+                limit = self.gate_window_seconds if other_gate else self.window_seconds
+                if elapsed < limit:
+                    return elapsed, previous[1]
+
+            if len(self._last_seen) >= self.max_entries and previous is None:
+                self._evict_oldest()
+            self._last_seen[reg_no] = (now, gate, tick)
+            self._slots[tick % self._slot_count].append(reg_no)
+            return None
@@ -1,27 +1,18 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
-from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash
-import qrcode
-import json
+from flask import Flask, request
+from flask_login import LoginManager
 import os
-from datetime import datetime
-import ssl
 
 from config import config
 from models import db, Student, Admin
-from forms import StudentRegistrationForm, StudentLoginForm, AdminLoginForm, AdminRegistrationForm
+from antipassback import AntiPassback
+from frame_decoder import FrameDecoder
+from occupancy import OccupancyTracker
+from profiling import RequestProfiler
+from resilience import CircuitBreaker, PassLookup
+from search_index import StudentSearchIndex
 
-app = Flask(__name__)
-
-# Load configuration based on environment
-config_name = os.environ.get('FLASK_ENV', 'development')
-app.config.from_object(config[config_name])
-
-# Initialize extensions
-db.init_app(app)
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login_choice'
+login_manager.login_view = 'main.login_choice'
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -31,227 +22,97 @@ def load_user(user_id):
     else:
         return Student.query.get(int(user_id))
 
-def generate_qr_code(student_data):
-    """Generate QR code for student pass"""
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr_data = {
-        'reg_no': student_data['reg_no'],
-        'name': student_data['name'],
-        'department': student_data['department'],
-        'year': student_data['year'],
-        'timestamp': datetime.now().isoformat()
-    }
-    qr.add_data(json.dumps(qr_data))
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Save QR code
-    qr_filename = f"{student_data['reg_no']}_pass.png"
-    qr_path = os.path.join(app.config['UPLOAD_FOLDER'], qr_filename)
-    img.save(qr_path)
-    
-    return qr_filename
-
-@app.route('/')
-def index():
-    return render_template('index.html')
-
-@app.route('/login_choice')
-def login_choice():
-    return render_template('login_choice.html')
-
-@app.route('/student_login', methods=['GET', 'POST'])
-def student_login():
-    form = StudentLoginForm()
-    if form.validate_on_submit():
-        student = Student.query.filter_by(reg_no=form.reg_no.data).first()
-        if student and student.check_password(form.password.data):
-            login_user(student)
-            return redirect(url_for('student_dashboard'))
-        flash('Invalid registration number or password', 'error')
-    return render_template('student_login.html', form=form)
-
-@app.route('/admin_login', methods=['GET', 'POST'])
-def admin_login():
-    form = AdminLoginForm()
-    if form.validate_on_submit():
-        admin = Admin.query.filter_by(username=form.username.data).first()
-        if admin and admin.check_password(form.password.data):
-            login_user(admin)
-            return redirect(url_for('admin_dashboard'))
-        flash('Invalid username or password', 'error')
-    return render_template('admin_login.html', form=form)
-
-@app.route('/admin_register', methods=['GET', 'POST'])
-def admin_register():
-    form = AdminRegistrationForm()
-    if form.validate_on_submit():
-        admin = Admin(username=form.username.data)
-        admin.set_password(form.password.data)
-        db.session.add(admin)
-        db.session.commit()
-        flash('Admin registration successful! You can now login.', 'success')
-        return redirect(url_for('admin_login'))
-    return render_template('admin_register.html', form=form)
-@app.route('/register', methods=['GET', 'POST'])
-def register():
-    form = StudentRegistrationForm()
-    if form.validate_on_submit():
-        # Check if registration number already exists
-        existing_student = Student.query.filter_by(reg_no=form.reg_no.data).first()
-        if existing_student:
-            flash('Registration number already exists!', 'error')
-            return render_template('register.html', form=form)
-        
-        student = Student(
-            reg_no=form.reg_no.data,
-            name=form.name.data,
-            department=form.department.data,
-            year=form.year.data
+def create_app(config_name=None):
+    """Application factory.
+
+    Nothing here touches the database or imports the QR libraries, so worker
+    restarts stay cheap; the schema is managed by migrations.py.
+    """
+    app = Flask(__name__)
+
+    # Load configuration based on environment
+    config_name = config_name or os.environ.get('FLASK_ENV', 'development')
+    app.config.from_object(config[config_name])
+
+    # Fail fast instead of hanging requests when MySQL is unreachable or the pool is exhausted
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('mysql'):
+        engine_options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        engine_options.setdefault('pool_timeout', app.config['DB_POOL_TIMEOUT_SECONDS'])
+        connect_args = engine_options.setdefault('connect_args', {})
+        connect_args.setdefault('connect_timeout', app.config['DB_CONNECT_TIMEOUT_SECONDS'])
+        for key in ('read_timeout', 'write_timeout'):
+            if app.config[f'DB_{key.upper()}_SECONDS']:
+                connect_args.setdefault(key, app.config[f'DB_{key.upper()}_SECONDS'])
+
+    # Initialize extensions
+    db.init_app(app)
+    login_manager.init_app(app)
+
+    if app.config['ANTI_PASSBACK_ENABLED']:
+        app.extensions['anti_passback'] = AntiPassback(
+            window_seconds=app.config['ANTI_PASSBACK_WINDOW_MINUTES'] * 60,
+            gate_window_seconds=app.config['ANTI_PASSBACK_GATE_WINDOW_MINUTES'] * 60,
+            max_entries=app.config['ANTI_PASSBACK_MAX_ENTRIES']
         )
-        student.set_password(form.password.data)
-        
-        # Generate QR code
-        qr_filename = generate_qr_code({
-            'reg_no': student.reg_no,
-            'name': student.name,
-            'department': student.department,
-            'year': student.year
-        })
-        student.qr_code_path = qr_filename
-        
-        db.session.add(student)
-        db.session.commit()
-        
-        flash('Registration successful! Your bus pass has been generated.', 'success')
-        return render_template('pass_generated.html', student=student)
-    
-    return render_template('register.html', form=form)
 
-@app.route('/student_dashboard')
-@login_required
-def student_dashboard():
-    if isinstance(current_user, Admin):
-        return redirect(url_for('admin_dashboard'))
-    return render_template('student_dashboard.html', student=current_user)
+    breaker = CircuitBreaker(failure_threshold=app.config['BREAKER_FAILURE_THRESHOLD'],
+                             reset_seconds=app.config['BREAKER_RESET_SECONDS'])
+    app.extensions['pass_lookup'] = PassLookup(
+        app,
+        breaker,
+        query_timeout_ms=app.config['VERIFY_QUERY_TIMEOUT_MS'],
+        refresh_seconds=app.config['PASS_SNAPSHOT_REFRESH_SECONDS']
+    )
 
-@app.route('/admin_dashboard')
-@login_required
-def admin_dashboard():
-    if not isinstance(current_user, Admin):
-        flash('Access denied! Admin access only.', 'error')
-        return redirect(url_for('student_dashboard'))
-    
-    students = Student.query.all()
-    return render_template('admin_dashboard.html', students=students)
+    app.extensions['occupancy'] = OccupancyTracker(
+        app,
+        flush_seconds=app.config['OCCUPANCY_FLUSH_SECONDS'],
+        directory_ttl=app.config['BUS_DIRECTORY_TTL_SECONDS'],
+        breaker=breaker
+    )
 
-@app.route('/scan')
-def scan():
-    return render_template('scan.html')
+    app.extensions['frame_decoder'] = FrameDecoder(
+        workers=app.config['FRAME_DECODE_WORKERS'],
+        max_pending=app.config['FRAME_DECODE_MAX_PENDING']
+    )
 
-@app.route('/verify', methods=['POST'])
-def verify():
-    try:
-        qr_data = request.json.get('qr_data')
-        if not qr_data:
-            return jsonify({'status': 'error', 'message': 'No QR data provided'})
-        
-        # Parse QR code data
-        student_data = json.loads(qr_data)
-        reg_no = student_data.get('reg_no')
-        
-        # Verify student in database
-        student = Student.query.filter_by(reg_no=reg_no).first()
-        
-        if student and student.is_active:
-            return jsonify({
-                'status': 'valid',
-                'student': {
-                    'reg_no': student.reg_no,
-                    'name': student.name,
-                    'department': student.department,
-                    'year': student.year
-                }
-            })
-        elif student and not student.is_active:
-            return jsonify({
-                'status': 'blocked',
-                'message': 'This pass has been revoked or blocked'
-            })
-        else:
-            return jsonify({
-                'status': 'invalid',
-                'message': 'Invalid or fake pass detected'
-            })
-    
-    except Exception as e:
-        return jsonify({'status': 'error', 'message': 'Invalid QR code format'})
+    search_index = StudentSearchIndex(refresh_seconds=app.config['SEARCH_INDEX_REFRESH_SECONDS'])
+    app.extensions['search_index'] = search_index
+
+    @app.before_request
+    def build_search_index():
+        # Built on the first request rather than in create_app, so scripts and
+        # cold starts never wait for it. Scanner traffic never starts a build.
+        endpoint = request.endpoint or ''
+        if endpoint.startswith('main.verify') or endpoint in ('main.scan', 'static'):
+            return
+        search_index.build_in_background(app)
 
-@app.route('/revoke_pass/<int:student_id>')
-@login_required
-def revoke_pass(student_id):
-    if not isinstance(current_user, Admin):
-        flash('Access denied! Admin access only.', 'error')
-        return redirect(url_for('student_dashboard'))
-    
-    student = Student.query.get_or_404(student_id)
-    student.is_active = False
-    db.session.commit()
-    flash(f'Pass revoked for {student.name}', 'warning')
-    return redirect(url_for('admin_dashboard'))
+    RequestProfiler(app)
 
-@app.route('/activate_pass/<int:student_id>')
-@login_required
-def activate_pass(student_id):
-    if not isinstance(current_user, Admin):
-        flash('Access denied! Admin access only.', 'error')
-        return redirect(url_for('student_dashboard'))
-    
-    student = Student.query.get_or_404(student_id)
-    student.is_active = True
-    db.session.commit()
-    flash(f'Pass activated for {student.name}', 'success')
-    return redirect(url_for('admin_dashboard'))
+    from views import main
+    app.register_blueprint(main)
 
-@app.route('/logout')
-@login_required
-def logout():
-    logout_user()
-    flash('You have been logged out successfully.', 'info')
-    return redirect(url_for('index'))
+    return app
 
 
 if __name__ == '__main__':
-    with app.app_context():
-        try:
-            db.create_all()
-            print("✅ Database tables created successfully!")
-        except Exception as e:
-            print(f"❌ Database connection failed: {e}")
-            print("Please ensure:")
-            print("1. MySQL server is running")
-            print("2. Database 'buspass_db' exists")
-            print("3. MySQL credentials are correct")
-            print("4. Run 'python create_database.py' first")
-            exit(1)
-        
-        # Create QR codes directory if it doesn't exist
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    
+    app = create_app()
+    print("ℹ️  Run 'python migrations.py upgrade' after pulling schema changes")
+
     # For development with HTTPS
     # In production, use proper SSL certificates
     #context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
     #context.load_cert_chain('cert.pem', 'key.pem')
-    
+
     try:
         # Try to run with HTTPS (comment out for basic development)
         # app.run(debug=True, host='0.0.0.0', port=5000, ssl_context=('cert.pem', 'key.pem'))
-        
+
         # For development without SSL (comment out the above line and uncomment this)
         app.run(debug=True, host='0.0.0.0', port=5000)
     except FileNotFoundError:
         print("SSL certificates not found. Running without HTTPS for development.")
         print("For production, generate SSL certificates using:")
         print("openssl req -x509 -newkey rsa:4096 -nodes -out cert.pem -keyout key.pem -days 365")
-        app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+        app.run(debug=True, host='0.0.0.0', port=5000)
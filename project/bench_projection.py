@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Projection Query Benchmark for College Bus Pass Authenticator System
+Loads synthetic students into an in-memory SQLite database and compares full
+Student entity loads against the column-projected records in queries.py, for
+the admin dashboard listing and for single pass lookups. Reports rows per
+second and the memory held per 10k rows.
+
+Usage:
+    python bench_projection.py [--students 10000] [--lookups 2000]
+"""
+
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+os.environ['DEV_DATABASE_URL'] = 'sqlite://'
+
+from app import create_app
+from models import db, Student, Route, Bus
+from queries import dashboard_students, pass_by_reg_no
+
+DEPARTMENTS = ['CSE', 'ECE', 'ME', 'CE', 'EEE', 'IT']
+
+
+def seed(count):
+    """Insert routes, buses and count students with realistic column sizes"""
+    rng = random.Random(7)
+    db.session.execute(db.insert(Route), [{'id': i, 'code': f"R{i}", 'name': f"Route {i}"} for i in range(1, 21)])
+    db.session.execute(db.insert(Bus), [{'id': i, 'number': f"TN01-{i:04d}", 'route_id': (i - 1) % 20 + 1,
+                                         'capacity': 50, 'occupancy': 0} for i in range(1, 61)])
+    # A real scrypt hash is ~160 characters; hashing 10k passwords would dominate the setup
+    password_hash = 'scrypt:32768:8:1$' + 'x' * 16 + '$' + 'f' * 128
+    db.session.execute(db.insert(Student), [{
+        'id': student_id,
+        'reg_no': f"23U{rng.choice(DEPARTMENTS)}{student_id:05d}",
+        'name': f"Student {student_id}",
+        'department': rng.choice(DEPARTMENTS),
+        'year': str(rng.randint(1, 4)),
+        'password_hash': password_hash,
+        'is_active': True,
+        'qr_code_path': f"qr_23U{student_id:05d}.png",
+        'pass_token': f"{rng.getrandbits(128):032x}",
+        'token_generation': 1,
+        'bus_id': rng.randint(1, 60),
+        'route_id': rng.randint(1, 20),
+    } for student_id in range(1, count + 1)])
+    db.session.commit()
+
+
+def full_dashboard():
+    """The admin dashboard query before the read layer"""
+    return Student.query.options(db.undefer('*'), db.joinedload(Student.bus), db.joinedload(Student.route)).all()
+
+
+def measure(load):
+    """Return (seconds, bytes still held by the result) for one load"""
+    db.session.expunge_all()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - started
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    db.session.expunge_all()
+    return elapsed, held
+
+
+def report(label, rows, elapsed, held=None):
+    line = f"   {label:<32} {rows / elapsed:>10,.0f} rows/s"
+    if held is not None:
+        line += f"   {held / rows * 10000 / 1024 / 1024:6.2f} MB per 10k"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full entity loads with projected records")
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.metadata.create_all(db.engine, tables=[Route.__table__, Bus.__table__, Student.__table__])
+        seed(args.students)
+        print(f"🌱 Seeded {args.students} students")
+        print("=" * 70)
+
+        for label, load in [("dashboard: full entities", full_dashboard),
+                            ("dashboard: projected records", dashboard_students)]:
+            measure(load)  # warm up
+            elapsed, held = measure(load)
+            report(label, args.students, elapsed, held)
+
+        reg_nos = [reg_no for (reg_no,) in db.session.execute(db.select(Student.reg_no))]
+        sample = random.Random(11).choices(reg_nos, k=args.lookups)
+        lookups = [
+            ("verify: full entity", lambda reg_no: Student.query.options(db.undefer('*'))
+             .filter_by(reg_no=reg_no).first()),
+            ("verify: projected record", pass_by_reg_no),
+        ]
+        for label, lookup in lookups:
+            db.session.expunge_all()
+            started = time.perf_counter()
+            for reg_no in sample:
+                lookup(reg_no)
+            report(label, len(sample), time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
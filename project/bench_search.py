@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Student Search Benchmark for College Bus Pass Authenticator System
+Builds the trigram search index over synthetic students and reports build
+time and query latency percentiles for exact, prefix and misspelled queries.
+
+Usage:
+    python bench_search.py [--students 100000] [--queries 2000]
+"""
+
+import argparse
+import random
+import statistics
+import string
+import time
+from collections import namedtuple
+
+from search_index import StudentSearchIndex
+
+Row = namedtuple('Row', 'id reg_no name department year is_active')
+
+FIRST_NAMES = ['Arun', 'Priya', 'Karthik', 'Divya', 'Subeshan', 'Lakshmi', 'Rahul', 'Meena',
+               'Vignesh', 'Anitha', 'Sanjay', 'Kavya', 'Harish', 'Deepa', 'Naveen', 'Swathi']
+LAST_NAMES = ['Kumar', 'Raman', 'Krishnan', 'Subramanian', 'Natarajan', 'Iyer', 'Reddy',
+              'Sharma', 'Pillai', 'Menon', 'Rao', 'Shankar', 'Murugan', 'Devi']
+DEPARTMENTS = ['CSE', 'ECE', 'ME', 'CE', 'EEE', 'IT']
+
+
+def synthetic_students(count):
+    rng = random.Random(7)
+    for student_id in range(1, count + 1):
+        department = rng.choice(DEPARTMENTS)
+        year = rng.randint(1, 4)
+        reg_no = f"{22 + year}U{department}{student_id:05d}"
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(string.ascii_uppercase)}"
+        yield Row(student_id, reg_no, name, department, str(year), True)
+
+
+def misspell(word, rng):
+    position = rng.randrange(len(word))
+    return word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the student search index")
+    parser.add_argument('--students', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    index = StudentSearchIndex()
+    rows = list(synthetic_students(args.students))
+    started = time.perf_counter()
+    for row in rows:
+        index._add(row)
+    index._built.set()
+    index._checked_at = float('inf')  # no database to sync from
+    print(f"🔨 Indexed {len(index)} students in {time.perf_counter() - started:.2f}s")
+
+    rng = random.Random(11)
+    kinds = {
+        'reg_no exact': lambda row: row.reg_no,
+        'reg_no prefix': lambda row: row.reg_no[:6],
+        'name': lambda row: row.name.split()[0] + ' ' + row.name.split()[1],
+        'name typo': lambda row: misspell(row.name.split()[1], rng),
+    }
+    print("=" * 60)
+    for kind, make_query in kinds.items():
+        timings = []
+        for _ in range(args.queries // len(kinds)):
+            query = make_query(rng.choice(rows))
+            started = time.perf_counter()
+            index.search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"   {kind:<15} median {statistics.median(timings):6.2f} ms   p95 {p95:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
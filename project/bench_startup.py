@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Cold Start Benchmark for College Bus Pass Authenticator System
+Starts fresh interpreters and measures how long it takes to import the
+application, build it with create_app() and serve the first request.
+Heavy modules that were loaded before the first QR render are reported too,
+so a regression back to eager imports shows up in the output.
+
+Usage:
+    python bench_startup.py [--runs 10] [--json]
+"""
+
+import sys
+import os
+import json
+import argparse
+import statistics
+import subprocess
+
+# Runs inside each fresh interpreter; prints one JSON line of timings
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+response = application.test_client().get('/')
+responded = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_response_ms': (responded - created) * 1000,
+    'total_ms': (responded - start) * 1000,
+    'status': response.status_code,
+    'heavy_modules': sorted(m for m in ('qrcode', 'PIL') if m in sys.modules),
+}))
+"""
+
+METRICS = ['import_ms', 'create_app_ms', 'first_response_ms', 'total_ms']
+
+
+def run_probe():
+    """Measure one cold start in a new interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Measure application cold start time")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help="print the summary as JSON")
+    args = parser.parse_args()
+
+    samples = [run_probe() for _ in range(args.runs)]
+    summary = {
+        metric: {
+            'median': statistics.median(s[metric] for s in samples),
+            'max': max(s[metric] for s in samples),
+        }
+        for metric in METRICS
+    }
+    summary['heavy_modules'] = samples[-1]['heavy_modules']
+    summary['status'] = samples[-1]['status']
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"🚀 Cold start over {args.runs} runs")
+    print("=" * 50)
+    for metric in METRICS:
+        print(f"   {metric:<20} median {summary[metric]['median']:8.1f}  max {summary[metric]['max']:8.1f}")
+    print(f"   first response status: {summary['status']}")
+    if summary['heavy_modules']:
+        print(f"⚠️  Loaded before first QR render: {', '.join(summary['heavy_modules'])}")
+    else:
+        print("✅ No QR/imaging modules loaded at startup")
+
+
+if __name__ == "__main__":
+    main()
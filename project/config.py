@@ -14,6 +14,64 @@ class Config:
     # File Upload Configuration
     UPLOAD_FOLDER = 'static/qrcodes'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    
+    # Anti-passback: repeat scans of a pass within the window are reported as duplicates
+    ANTI_PASSBACK_ENABLED = True
+    ANTI_PASSBACK_WINDOW_MINUTES = 10       # any gate
+    ANTI_PASSBACK_GATE_WINDOW_MINUTES = 60  # a different gate than the last scan
+    ANTI_PASSBACK_MAX_ENTRIES = 100000
+    
+    # Bus occupancy: in-memory boarding counters are added to the database this often
+    OCCUPANCY_FLUSH_SECONDS = 10
+    BUS_DIRECTORY_TTL_SECONDS = 60
+    
+    # Pass validity: new passes run for this many days; expire_passes.py deactivates
+    # expired passes in batches
+    PASS_VALIDITY_DAYS = 365
+    PASS_EXPIRY_BATCH_SIZE = 500
+    
+    # Verification resilience: failing or slow pass lookups trip a circuit breaker and
+    # scans are then answered from an in-memory snapshot of passes, flagged stale
+    VERIFY_QUERY_TIMEOUT_MS = 500
+    DB_CONNECT_TIMEOUT_SECONDS = 3
+    DB_POOL_TIMEOUT_SECONDS = 5
+    # Bound on waiting for any one statement or write so a dead server does not hang a
+    # worker; 0 disables it for migrations.py and scan_partitions.py, whose ALTERs run long
+    DB_READ_TIMEOUT_SECONDS = int(os.environ.get('DB_READ_TIMEOUT_SECONDS', 30))
+    DB_WRITE_TIMEOUT_SECONDS = int(os.environ.get('DB_WRITE_TIMEOUT_SECONDS', 30))
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_RESET_SECONDS = 30
+    PASS_SNAPSHOT_REFRESH_SECONDS = 60
+    
+    # Offline scans: scanners without signal queue scans and upload them in batches
+    OFFLINE_SCAN_BATCH_MAX = 500
+    
+    # Kiosk frame uploads: QR codes are decoded server-side on a process pool
+    FRAME_DECODE_WORKERS = 2
+    FRAME_DECODE_MAX_PENDING = 16     # frames queued or decoding per web worker
+    FRAME_MAX_BYTES = 2 * 1024 * 1024
+    FRAME_MAX_COUNT = 8               # frames per request
+    
+    # Student search: in-memory trigram index, refreshed from other workers' changes
+    SEARCH_INDEX_REFRESH_SECONDS = 30
+    
+    # QR rotation: pass tokens older than the period are reissued by rotate_passes.py
+    QR_ROTATION_PERIOD_HOURS = 24
+    QR_ROTATION_BATCH_SIZE = 500
+    QR_ROTATION_WORKERS = os.cpu_count()
+    QR_ROTATION_STATE_FILE = 'qr_rotation_state.json'
+    
+    # Scan history: monthly pass_scans partitions kept by scan_partitions.py
+    SCAN_PARTITION_MONTHS_AHEAD = 3
+    SCAN_RETENTION_MONTHS = 13
+    
+    # Request profiling: off by default; when on, a sampled fraction of requests and
+    # admin requests sending the header are profiled into a ring of report files
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED') == '1'
+    PROFILING_SAMPLE_RATE = 0.01
+    PROFILING_HEADER = 'X-Profile-Request'
+    PROFILE_DIR = 'profiles'
+    PROFILE_RING_SIZE = 50
 
 class DevelopmentConfig(Config):
     DEBUG = True
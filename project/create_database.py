@@ -9,6 +9,12 @@ from mysql.connector import Error
 import sys
 import os
 from werkzeug.security import generate_password_hash
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db
+from migrations import upgrade, check_schema
 
 # Database configuration
 DB_CONFIG = {
@@ -40,74 +46,33 @@ def create_database():
         return False
 
 def create_tables():
-    """Create all required tables"""
+    """Create or upgrade all tables through the versioned migrations in migrations.py"""
     try:
-        # Connect to the specific database
-        config = DB_CONFIG.copy()
-        config['database'] = DATABASE_NAME
-        
-        connection = mysql.connector.connect(**config)
-        cursor = connection.cursor()
-        
-        # Create students table
-        students_table = """
-        CREATE TABLE IF NOT EXISTS students (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            reg_no VARCHAR(20) UNIQUE NOT NULL,
-            name VARCHAR(100) NOT NULL,
-            department VARCHAR(50) NOT NULL,
-            year VARCHAR(10) NOT NULL,
-            password_hash VARCHAR(255) NOT NULL,
-            is_active BOOLEAN DEFAULT TRUE,
-            qr_code_path VARCHAR(200),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            INDEX idx_reg_no (reg_no),
-            INDEX idx_is_active (is_active)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-        """
-        
-        # Create admins table
-        admins_table = """
-        CREATE TABLE IF NOT EXISTS admins (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            username VARCHAR(80) UNIQUE NOT NULL,
-            password_hash VARCHAR(255) NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            INDEX idx_username (username)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-        """
-        
-        # Create pass_scans table for tracking scans
-        pass_scans_table = """
-        CREATE TABLE IF NOT EXISTS pass_scans (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            student_id INT NOT NULL,
-            scanned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            scanner_info VARCHAR(200),
-            status ENUM('valid', 'invalid', 'blocked') NOT NULL,
-            FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
-            INDEX idx_student_id (student_id),
-            INDEX idx_scanned_at (scanned_at)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-        """
-        
-        # Execute table creation
-        cursor.execute(students_table)
-        print("✅ Students table created successfully!")
-        
-        cursor.execute(admins_table)
-        print("✅ Admins table created successfully!")
-        
-        cursor.execute(pass_scans_table)
-        print("✅ Pass scans table created successfully!")
-        
-        cursor.close()
-        connection.close()
+        engine = create_engine(URL.create(
+            'mysql+pymysql',
+            username=DB_CONFIG['user'],
+            password=DB_CONFIG['password'],
+            host=DB_CONFIG['host'],
+            database=DATABASE_NAME,
+            query={'charset': DB_CONFIG['charset']}
+        ))
+        
+        applied = upgrade(engine)
+        for version in applied:
+            print(f"✅ Applied schema migration {version}")
+        
+        problems = check_schema(engine, db.metadata)
+        engine.dispose()
+        if problems:
+            print("❌ Database schema differs from models.py:")
+            for problem in problems:
+                print(f"   - {problem}")
+            return False
+        
+        print("✅ Students, admins and pass scans tables are up to date!")
         return True
         
-    except Error as e:
+    except SQLAlchemyError as e:
         print(f"❌ Error creating tables: {e}")
         return False
 
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Pass Expiry Sweeper for College Bus Pass Authenticator System
+Deactivates active passes whose valid_until date has passed, so they show as
+inactive on the dashboards and in the search index. Verification already
+rejects expired passes by date; this job only brings is_active in line. Swept
+passes get expired_at, so renewal reactivates them but not revoked passes.
+
+Each batch reads at most PASS_EXPIRY_BATCH_SIZE ids through the
+(is_active, valid_until) index and commits on its own, so the sweep never
+scans the students table or holds locks on many rows. Run it from cron or
+with --every, outside the web workers:
+
+    5 0 * * * cd /path/to/project && python expire_passes.py
+"""
+
+import argparse
+import time
+from datetime import date, datetime
+from sqlalchemy import select, update
+
+from app import create_app
+from models import db, Student
+
+
+def expired_batch_query(today, limit):
+    return (
+        select(Student.id)
+        .where(Student.is_active == True, Student.valid_until < today)
+        .order_by(Student.valid_until)
+        .limit(limit)
+    )
+
+
+def expired_batch(today, limit):
+    """Ids of active passes that ended before today, oldest first"""
+    return db.session.execute(expired_batch_query(today, limit)).scalars().all()
+
+
+def sweep(batch_size, pause=0.0, today=None):
+    """Deactivate every expired pass in batches; returns the count deactivated"""
+    today = today or date.today()
+    deactivated = 0
+    while True:
+        ids = expired_batch(today, batch_size)
+        if not ids:
+            return deactivated
+        db.session.execute(
+            update(Student).where(Student.id.in_(ids))
+            .values(is_active=False, expired_at=datetime.utcnow())
+        )
+        db.session.commit()
+        deactivated += len(ids)
+        print(f"   🔒 {deactivated} passes deactivated")
+        if pause:
+            time.sleep(pause)
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Deactivate passes past their valid-until date")
+    parser.add_argument('--batch-size', type=int)
+    parser.add_argument('--pause', type=float, default=0.0, metavar='SECONDS',
+                        help="sleep between batches to leave room for live traffic")
+    parser.add_argument('--every', type=float, metavar='MINUTES',
+                        help="keep running and sweep every MINUTES")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        while True:
+            started = time.perf_counter()
+            deactivated = sweep(args.batch_size or app.config['PASS_EXPIRY_BATCH_SIZE'], args.pause)
+            print(f"🎉 Deactivated {deactivated} expired passes in {time.perf_counter() - started:.1f}s")
+            if not args.every:
+                break
+            time.sleep(args.every * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Check for College Bus Pass Authenticator System
+Runs EXPLAIN on the application's hot queries and exits non-zero if any of
+them stops using an index. Run it against a database with representative
+data: on a nearly empty table MySQL may legitimately prefer a full scan.
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+from models import db
+from queries import admin_login_query, pass_query, passes_changed_query, passes_query, student_login_query
+from search_index import changed_students_query
+from rotate_passes import due_students_query
+from expire_passes import expired_batch_query
+from offline_scans import stored_scans_query
+
+
+def hot_queries():
+    """Return (description, statement) pairs for the queries on the request path.
+
+    Each statement comes from the function the application runs it through,
+    so a change to one of those queries is checked here as well.
+    """
+    now = datetime.utcnow()
+    since = now - timedelta(hours=1)
+    return [
+        ("verify: pass by reg_no", pass_query('SAMPLE001', timeout_ms=500)),
+        ("offline upload: passes by reg_no", passes_query(['SAMPLE001', 'SAMPLE002'])),
+        ("offline upload: scans already recorded",
+         stored_scans_query(['c1', 'c2'], since, now)),
+        ("student login: student by reg_no", student_login_query('SAMPLE001')),
+        ("admin login: admin by username", admin_login_query('admin')),
+        ("pass snapshot refresh: recently changed passes", passes_changed_query(since)),
+        ("search index refresh: recently changed students", changed_students_query(since)),
+        ("passes due for QR rotation", due_students_query(since, 500)),
+        ("expired passes still active", expired_batch_query(now.date(), 500)),
+    ]
+
+
+def _execute_explain(conn, prefix, statement):
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+    return conn.exec_driver_sql(f"{prefix} {compiled}", params).mappings().all()
+
+
+def _unindexed_mysql(conn, statement):
+    """Tables in a MySQL plan that are read without a key"""
+    rows = _execute_explain(conn, "EXPLAIN", statement)
+    return [row['table'] for row in rows if row['table'] and row['key'] is None]
+
+
+def _unindexed_sqlite(conn, statement):
+    """Tables in a SQLite plan that are scanned without an index"""
+    rows = _execute_explain(conn, "EXPLAIN QUERY PLAN", statement)
+    return [row['detail'] for row in rows
+            if row['detail'].startswith('SCAN') and 'USING' not in row['detail']]
+
+
+def check_plans(engine, queries=None):
+    """EXPLAIN each hot query and return (description, unindexed tables) failures"""
+    dialect = engine.dialect.name
+    if dialect == 'mysql':
+        unindexed = _unindexed_mysql
+    elif dialect == 'sqlite':
+        unindexed = _unindexed_sqlite
+    else:
+        raise ValueError(f"EXPLAIN check does not support the {dialect} dialect")
+
+    failures = []
+    with engine.connect() as conn:
+        for description, statement in queries or hot_queries():
+            tables = unindexed(conn, statement)
+            if tables:
+                failures.append((description, tables))
+    return failures
+
+
+def main():
+    """Command line entry point"""
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        queries = hot_queries()
+        failures = check_plans(db.engine, queries)
+
+    for description, _ in queries:
+        failed = [tables for name, tables in failures if name == description]
+        if failed:
+            print(f"❌ {description}: full scan of {', '.join(failed[0])}")
+        else:
+            print(f"✅ {description}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,26 @@
+from datetime import date
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField, SelectField
-from wtforms.validators import DataRequired, Length, Regexp, ValidationError
-from models import Student
+from wtforms import StringField, PasswordField, SubmitField, SelectField, IntegerField, DateField, BooleanField
+from wtforms.validators import DataRequired, Length, Regexp, ValidationError, NumberRange, Optional
+from models import Student, Admin, Route, Bus
+from queries import is_taken
+
+DEPARTMENT_CHOICES = [
+    ('CSE', 'Computer Science Engineering'),
+    ('ECE', 'Electronics and Communication Engineering'),
+    ('ME', 'Mechanical Engineering'),
+    ('CE', 'Civil Engineering'),
+    ('EEE', 'Electrical and Electronics Engineering'),
+    ('IT', 'Information Technology'),
+    ('Other', 'Other')
+]
+
+YEAR_CHOICES = [
+    ('1', '1st Year'),
+    ('2', '2nd Year'),
+    ('3', '3rd Year'),
+    ('4', '4th Year')
+]
 
 class StudentRegistrationForm(FlaskForm):
     reg_no = StringField('Registration Number', validators=[
@@ -13,21 +32,8 @@ class StudentRegistrationForm(FlaskForm):
         DataRequired(),
         Length(min=2, max=100)
     ])
-    department = SelectField('Department', choices=[
-        ('CSE', 'Computer Science Engineering'),
-        ('ECE', 'Electronics and Communication Engineering'),
-        ('ME', 'Mechanical Engineering'),
-        ('CE', 'Civil Engineering'),
-        ('EEE', 'Electrical and Electronics Engineering'),
-        ('IT', 'Information Technology'),
-        ('Other', 'Other')
-    ], validators=[DataRequired()])
-    year = SelectField('Year', choices=[
-        ('1', '1st Year'),
-        ('2', '2nd Year'),
-        ('3', '3rd Year'),
-        ('4', '4th Year')
-    ], validators=[DataRequired()])
+    department = SelectField('Department', choices=DEPARTMENT_CHOICES, validators=[DataRequired()])
+    year = SelectField('Year', choices=YEAR_CHOICES, validators=[DataRequired()])
     password = PasswordField('Password', validators=[
         DataRequired(),
         Length(min=6, max=20)
@@ -35,8 +41,7 @@ class StudentRegistrationForm(FlaskForm):
     submit = SubmitField('Register & Generate Pass')
     
     def validate_reg_no(self, reg_no):
-        student = Student.query.filter_by(reg_no=reg_no.data).first()
-        if student:
+        if is_taken(Student.reg_no, reg_no.data):
             raise ValidationError('Registration number already exists. Please choose a different one.')
 
 class StudentLoginForm(FlaskForm):
@@ -64,9 +69,7 @@ class AdminRegistrationForm(FlaskForm):
     submit = SubmitField('Register as Admin')
     
     def validate_username(self, username):
-        from models import Admin
-        admin = Admin.query.filter_by(username=username.data).first()
-        if admin:
+        if is_taken(Admin.username, username.data):
             raise ValidationError('Username already exists. Please choose a different one.')
     
     def validate_confirm_password(self, confirm_password):
@@ -80,4 +83,54 @@ class AdminRegistrationForm(FlaskForm):
 class AdminLoginForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
     password = PasswordField('Password', validators=[DataRequired()])
-    submit = SubmitField('Login')
\ No newline at end of file
+    submit = SubmitField('Login')
+
+class RouteForm(FlaskForm):
+    code = StringField('Route Code', validators=[
+        DataRequired(),
+        Length(max=20),
+        Regexp('^[A-Za-z0-9-]+$', message="Route code must contain only letters, numbers and hyphens")
+    ])
+    name = StringField('Route Name', validators=[DataRequired(), Length(max=100)])
+    submit = SubmitField('Add Route')
+    
+    def validate_code(self, code):
+        if is_taken(Route.code, code.data):
+            raise ValidationError('Route code already exists.')
+
+class BusForm(FlaskForm):
+    number = StringField('Bus Number', validators=[
+        DataRequired(),
+        Length(max=20),
+        Regexp('^[A-Za-z0-9-]+$', message="Bus number must contain only letters, numbers and hyphens")
+    ])
+    route_id = SelectField('Route', coerce=int, validators=[DataRequired()])
+    capacity = IntegerField('Capacity', validators=[DataRequired(), NumberRange(min=1, max=200)])
+    submit = SubmitField('Add Bus')
+    
+    def validate_number(self, number):
+        if is_taken(Bus.number, number.data):
+            raise ValidationError('Bus number already exists.')
+
+class AssignBusForm(FlaskForm):
+    reg_no = StringField('Registration Number', validators=[DataRequired()])
+    bus_id = SelectField('Bus', coerce=int, validators=[DataRequired()])
+    submit = SubmitField('Assign Bus')
+    
+    def validate_reg_no(self, reg_no):
+        if not is_taken(Student.reg_no, reg_no.data):
+            raise ValidationError('No student with this registration number.')
+
+class RenewPassesForm(FlaskForm):
+    department = SelectField('Department', choices=DEPARTMENT_CHOICES, validators=[DataRequired()])
+    year = SelectField('Year', choices=YEAR_CHOICES, validators=[DataRequired()])
+    valid_from = DateField('Valid From', validators=[Optional()])
+    valid_until = DateField('Valid Until', validators=[DataRequired()])
+    reactivate = BooleanField('Reactivate passes that have expired', default=True)
+    submit = SubmitField('Renew Passes')
+    
+    def validate_valid_until(self, valid_until):
+        if valid_until.data < date.today():
+            raise ValidationError('The new end date is already in the past.')
+        if self.valid_from.data and valid_until.data < self.valid_from.data:
+            raise ValidationError('The end date must not be before the start date.')
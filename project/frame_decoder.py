@@ -0,0 +1,113 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+
+class DecoderBusy(Exception):
+    """Raised when every decode slot is taken and a frame cannot be queued"""
+
+
+def decode_frame(data):
+    """Decode every QR code in an encoded image; runs in a pool process.
+
+    Returns (payloads, error, decode_ms), timed here so queueing in the pool
+    is not counted as decode latency.
+    """
+    # OpenCV is only needed by the decoder processes, never by the web workers
+    import cv2
+    import numpy as np
+
+    started = time.perf_counter()
+    payloads, error = [], None
+    try:
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            error = "Unreadable image"
+        else:
+            found, texts, _, _ = cv2.QRCodeDetector().detectAndDecodeMulti(image)
+            payloads = [text for text in texts if text] if found else []
+    except cv2.error:
+        error = "Could not decode image"
+    return payloads, error, round((time.perf_counter() - started) * 1000, 2)
+
+
+class FrameDecoder:
+    """Bounded process pool that decodes QR codes from uploaded camera frames.
+
+    At most max_pending frames are queued or decoding at once across all
+    requests of this worker; a slot is held until its frame has actually left
+    the pool, even if the request stopped waiting for it. Beyond that decode()
+    raises DecoderBusy instead of letting a burst of uploads pile up. The pool
+    is created on first use with the spawn start method, so decoder processes
+    do not inherit the web worker's threads or database connections, and it is
+    recreated if a decoder process dies.
+    """
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def _discard(self, pool):
+        """Drop a broken pool so the next frame starts a fresh one"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def _submit(self, data):
+        """Return (pool, future), retrying once on a fresh pool if this one died"""
+        pool = self._executor()
+        try:
+            return pool, pool.submit(decode_frame, data)
+        except BrokenProcessPool:
+            self._discard(pool)
+            pool = self._executor()
+            return pool, pool.submit(decode_frame, data)
+
+    def decode(self, frames, timeout=10):
+        """Decode several frames in parallel.
+
+        Returns one (payloads, error, decode_ms) tuple per frame, in order;
+        decode_ms is None when the frame did not finish decoding.
+        Raises DecoderBusy before submitting anything if the frames do not fit.
+        """
+        acquired = 0
+        futures = []
+        try:
+            for _ in frames:
+                if not self._slots.acquire(blocking=False):
+                    raise DecoderBusy()
+                acquired += 1
+            for data in frames:
+                pool, future = self._submit(data)
+                future.add_done_callback(lambda _: self._slots.release())
+                futures.append((pool, future))
+        finally:
+            # Slots of submitted frames are released by their done callbacks
+            for _ in range(acquired - len(futures)):
+                self._slots.release()
+
+        deadline = time.monotonic() + timeout
+        results = []
+        for pool, future in futures:
+            try:
+                results.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+            except TimeoutError:
+                results.append(([], "Decoding timed out", None))
+            except BrokenProcessPool:
+                self._discard(pool)
+                results.append(([], "Decoder restarted, please retry", None))
+            except Exception:
+                results.append(([], "Decoding failed", None))
+        return results
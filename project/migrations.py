@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Versioned Schema Migrations for College Bus Pass Authenticator System
+models.py is the single source of truth for the schema. Every change to a model
+gets a numbered migration here that brings an existing MySQL database in line
+with it, and `check` reports any drift between the models and a live database.
+
+Usage:
+    python migrations.py upgrade   # apply pending migrations
+    python migrations.py status    # show applied and pending migrations
+    python migrations.py check     # exit 1 if the database differs from models.py
+"""
+
+import os
+import sys
+import argparse
+from sqlalchemy import Boolean, Date, DateTime, Enum, Integer, String, TIMESTAMP, inspect, text
+
+MIGRATIONS = []
+
+
+class MigrationError(Exception):
+    """Raised when a migration cannot proceed without losing data"""
+
+
+def migration(version, description):
+    """Register a migration function under a schema version"""
+    def register(func):
+        if any(existing[0] == version for existing in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append((version, description, func))
+        return func
+    return register
+
+
+def _has_table(conn, table):
+    return inspect(conn).has_table(table)
+
+
+def _columns(conn, table):
+    return {column['name'] for column in inspect(conn).get_columns(table)}
+
+
+def _indexes(conn, table):
+    return {index['name'] for index in inspect(conn).get_indexes(table)}
+
+
+def _add_column(conn, table, column, definition):
+    if column not in _columns(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+
+
+def _add_index(conn, table, name, columns, unique=False):
+    if name not in _indexes(conn, table):
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        conn.execute(text(f"ALTER TABLE {table} ADD {kind} {name} ({columns})"))
+
+
+def _config(key):
+    """Setting from the running app, or the default config for standalone runs"""
+    from flask import current_app, has_app_context
+    if has_app_context():
+        return current_app.config[key]
+    from config import Config
+    return getattr(Config, key)
+
+
+def _drop_index(conn, table, name):
+    if name in _indexes(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} DROP INDEX {name}"))
+
+
+def _adopt_legacy_tables(conn):
+    # Databases built by db.create_all() before the models named their tables
+    # use Flask-SQLAlchemy's default singular names. create_database.py also
+    # created empty plural tables alongside them, which the app never used.
+    for legacy, table in (('student', 'students'), ('admin', 'admins')):
+        if not _has_table(conn, legacy):
+            continue
+        if not _has_table(conn, table):
+            conn.execute(text(f"RENAME TABLE {legacy} TO {table}"))
+            continue
+        if conn.execute(text(f"SELECT 1 FROM {table} LIMIT 1")).first() is not None:
+            if conn.execute(text(f"SELECT 1 FROM {legacy} LIMIT 1")).first() is not None:
+                raise MigrationError(f"Both {legacy} and {table} hold rows; merge them by hand "
+                                     f"and drop {legacy} before upgrading")
+            conn.execute(text(f"DROP TABLE {legacy}"))
+            continue
+        # pass_scans may already reference the plural table, so copy rather than swap
+        columns = ', '.join(sorted(_columns(conn, legacy) & _columns(conn, table)))
+        conn.execute(text(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {legacy}"))
+        conn.execute(text(f"DROP TABLE {legacy}"))
+
+
+@migration(1, "Baseline students, admins and pass_scans tables")
+def _baseline(conn):
+    _adopt_legacy_tables(conn)
+
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS students (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            reg_no VARCHAR(20) UNIQUE NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            department VARCHAR(50) NOT NULL,
+            year VARCHAR(10) NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            is_active BOOLEAN DEFAULT TRUE,
+            qr_code_path VARCHAR(200),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_reg_no (reg_no),
+            INDEX idx_is_active (is_active)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS admins (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(80) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_username (username)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS pass_scans (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            student_id INT NOT NULL,
+            scanned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            scanner_info VARCHAR(200),
+            status ENUM('valid', 'invalid', 'blocked') NOT NULL,
+            FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
+            INDEX idx_student_id (student_id),
+            INDEX idx_scanned_at (scanned_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """))
+
+
+@migration(2, "Align students and admins with models.py and add composite indexes")
+def _align_with_models(conn):
+    # Tables created by db.create_all() had no timestamps on admins and no updated_at
+    timestamp = "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+    _add_column(conn, 'students', 'updated_at', f"{timestamp} ON UPDATE CURRENT_TIMESTAMP")
+    _add_column(conn, 'admins', 'created_at', timestamp)
+    _add_column(conn, 'admins', 'updated_at', f"{timestamp} ON UPDATE CURRENT_TIMESTAMP")
+    conn.execute(text("ALTER TABLE students MODIFY password_hash VARCHAR(255) NOT NULL"))
+    conn.execute(text("ALTER TABLE admins MODIFY password_hash VARCHAR(255) NOT NULL"))
+
+    # The unique keys on reg_no and username already index those columns, and
+    # is_active alone is covered by the leading column of the new composite index
+    _drop_index(conn, 'students', 'idx_reg_no')
+    _drop_index(conn, 'students', 'idx_is_active')
+    _drop_index(conn, 'admins', 'idx_username')
+    _add_index(conn, 'students', 'idx_students_dept_year_active', 'department, year, is_active')
+    _add_index(conn, 'students', 'idx_students_active_created', 'is_active, created_at')
+
+
+@migration(3, "Add rotating pass tokens to students")
+def _pass_tokens(conn):
+    _add_column(conn, 'students', 'pass_token', "VARCHAR(64) NULL")
+    _add_column(conn, 'students', 'previous_pass_token', "VARCHAR(64) NULL")
+    _add_column(conn, 'students', 'token_generation', "INT NOT NULL DEFAULT 0")
+    _add_column(conn, 'students', 'token_rotated_at', "DATETIME NULL")
+    _add_index(conn, 'students', 'idx_students_token_rotated', 'token_rotated_at')
+
+
+@migration(4, "Add routes and buses and assign them to students")
+def _routes_and_buses(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS routes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            code VARCHAR(20) UNIQUE NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS buses (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            number VARCHAR(20) UNIQUE NOT NULL,
+            route_id INT NOT NULL,
+            capacity INT NOT NULL,
+            occupancy INT NOT NULL DEFAULT 0,
+            occupancy_updated_at DATETIME NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (route_id) REFERENCES routes(id) ON DELETE CASCADE,
+            INDEX idx_buses_route (route_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """))
+    _add_column(conn, 'students', 'route_id', "INT NULL")
+    _add_column(conn, 'students', 'bus_id', "INT NULL")
+    _add_index(conn, 'students', 'idx_students_route', 'route_id')
+    _add_index(conn, 'students', 'idx_students_bus', 'bus_id')
+    foreign_keys = {fk['name'] for fk in inspect(conn).get_foreign_keys('students')}
+    if 'fk_students_route' not in foreign_keys:
+        conn.execute(text("ALTER TABLE students ADD CONSTRAINT fk_students_route "
+                          "FOREIGN KEY (route_id) REFERENCES routes(id) ON DELETE SET NULL"))
+    if 'fk_students_bus' not in foreign_keys:
+        conn.execute(text("ALTER TABLE students ADD CONSTRAINT fk_students_bus "
+                          "FOREIGN KEY (bus_id) REFERENCES buses(id) ON DELETE SET NULL"))
+
+
+@migration(5, "Partition pass_scans by month and add daily scan summaries")
+def _partition_scans(conn):
+    from scan_partitions import is_partitioned, partition_table
+
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS scan_daily_summaries (
+            scan_date DATE NOT NULL,
+            student_id INT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            scan_count INT NOT NULL,
+            first_scan_at DATETIME NULL,
+            last_scan_at DATETIME NULL,
+            PRIMARY KEY (scan_date, student_id, status)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """))
+    if is_partitioned(conn):
+        return
+
+    # Partitioned tables allow no foreign keys and need scanned_at in the primary key
+    for foreign_key in inspect(conn).get_foreign_keys('pass_scans'):
+        conn.execute(text(f"ALTER TABLE pass_scans DROP FOREIGN KEY {foreign_key['name']}"))
+    conn.execute(text("ALTER TABLE pass_scans MODIFY scanned_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP"))
+    conn.execute(text("ALTER TABLE pass_scans DROP PRIMARY KEY, ADD PRIMARY KEY (id, scanned_at)"))
+    partition_table(conn, months_ahead=_config('SCAN_PARTITION_MONTHS_AHEAD'))
+
+
+@migration(6, "Index students.updated_at for incremental search index refresh")
+def _students_updated_index(conn):
+    _add_index(conn, 'students', 'idx_students_updated', 'updated_at')
+
+
+@migration(7, "Add pass validity windows to students")
+def _pass_validity(conn):
+    _add_column(conn, 'students', 'valid_from', "DATE NULL")
+    _add_column(conn, 'students', 'valid_until', "DATE NULL")
+    _add_index(conn, 'students', 'idx_students_active_valid_until', 'is_active, valid_until')
+
+
+@migration(8, "Record offline scan uploads in pass_scans")
+def _offline_scans(conn):
+    # Appending ENUM values is an in-place change, even on the partitioned table
+    conn.execute(text(
+        "ALTER TABLE pass_scans MODIFY status "
+        "ENUM('valid', 'invalid', 'blocked', 'expired', 'not_yet_valid') NOT NULL"
+    ))
+    _add_column(conn, 'pass_scans', 'client_id', "VARCHAR(64) NULL")
+    _add_index(conn, 'pass_scans', 'uq_pass_scans_client', 'client_id, scanned_at', unique=True)
+
+
+@migration(9, "Convert legacy TIMESTAMP columns to DATETIME")
+def _timestamps_to_datetime(conn):
+    # The models declare DateTime; TIMESTAMP also converts values to the session
+    # time zone and stops at 2038. The stored wall-clock values are kept.
+    for table, column, on_update in (('students', 'created_at', False),
+                                     ('students', 'updated_at', True),
+                                     ('admins', 'created_at', False),
+                                     ('admins', 'updated_at', True),
+                                     ('routes', 'created_at', False),
+                                     ('buses', 'created_at', False)):
+        definition = "DATETIME NULL DEFAULT CURRENT_TIMESTAMP"
+        if on_update:
+            definition += " ON UPDATE CURRENT_TIMESTAMP"
+        conn.execute(text(f"ALTER TABLE {table} MODIFY {column} {definition}"))
+
+
+@migration(10, "Record when the expiry sweeper deactivated a pass")
+def _expired_at(conn):
+    # Passes deactivated before this cannot be told apart from revocations and
+    # are left as revoked
+    _add_column(conn, 'students', 'expired_at', "DATETIME NULL")
+
+
+def _ensure_version_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(200) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+
+def current_version(conn):
+    """Return the highest applied migration version (0 for a new database)"""
+    _ensure_version_table(conn)
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def upgrade(engine, target=None):
+    """Apply pending migrations in order and return the versions applied.
+
+    MySQL commits DDL implicitly, so each migration is written to be safe to
+    re-run if it is interrupted part way through.
+    """
+    applied = []
+    for version, description, func in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if target is not None and version > target:
+            break
+        with engine.begin() as conn:
+            if version <= current_version(conn):
+                continue
+            func(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description) VALUES (:version, :description)"),
+                {'version': version, 'description': description}
+            )
+        applied.append(version)
+    return applied
+
+
+def _type_problem(model_type, live_type):
+    """Describe how a live column type differs from the model, or return None"""
+    if isinstance(model_type, Enum):
+        # Backends without ENUM store it as VARCHAR; only compare real ENUMs
+        live_values = getattr(live_type, 'enums', None)
+        if live_values is not None and set(live_values) != set(model_type.enums):
+            return f"ENUM{tuple(live_values)} instead of ENUM{tuple(model_type.enums)}"
+        return None
+    if isinstance(model_type, String):
+        if not isinstance(live_type, String):
+            return f"{live_type} instead of VARCHAR({model_type.length})"
+        if model_type.length and live_type.length != model_type.length:
+            return f"length {live_type.length} instead of {model_type.length}"
+        return None
+    if isinstance(model_type, Boolean):
+        # MySQL stores BOOLEAN as TINYINT(1)
+        ok = isinstance(live_type, (Boolean, Integer))
+    elif isinstance(model_type, Integer):
+        ok = isinstance(live_type, Integer) and not isinstance(live_type, Boolean)
+    elif isinstance(model_type, DateTime):
+        ok = isinstance(live_type, DateTime) and not isinstance(live_type, TIMESTAMP)
+    elif isinstance(model_type, Date):
+        ok = isinstance(live_type, Date) and not isinstance(live_type, DateTime)
+    else:
+        return None
+    return None if ok else f"{live_type} instead of {model_type}"
+
+
+def check_schema(engine, metadata):
+    """Compare a live database with the model metadata and return a list of differences"""
+    problems = []
+    inspector = inspect(engine)
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            problems.append(f"missing table {table.name}")
+            continue
+
+        live_columns = {column['name']: column for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            live = live_columns.get(column.name)
+            if live is None:
+                problems.append(f"missing column {table.name}.{column.name}")
+                continue
+            difference = _type_problem(column.type, live['type'])
+            if difference:
+                problems.append(f"column {table.name}.{column.name} is {difference}")
+            # Primary keys are never NULL, whatever SQLite reports for its rowid alias
+            if not column.primary_key and live['nullable'] != column.nullable:
+                expected = "NULL" if column.nullable else "NOT NULL"
+                problems.append(f"column {table.name}.{column.name} should be {expected}")
+
+        live_indexes = {index['name']: index for index in inspector.get_indexes(table.name)}
+        model_indexes = {index.name for index in table.indexes}
+        for name in sorted(model_indexes - set(live_indexes)):
+            problems.append(f"missing index {table.name}.{name}")
+        for name, index in sorted(live_indexes.items()):
+            if name not in model_indexes and not index.get('unique'):
+                problems.append(f"undeclared index {table.name}.{name}")
+    return problems
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Manage the bus pass database schema")
+    parser.add_argument('command', choices=['upgrade', 'status', 'check'], nargs='?', default='upgrade')
+    args = parser.parse_args()
+
+    # Table rebuilds can take far longer than a web request may wait on MySQL
+    os.environ.setdefault('DB_READ_TIMEOUT_SECONDS', '0')
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        engine = db.engine
+
+        if args.command == 'upgrade':
+            try:
+                applied = upgrade(engine)
+            except MigrationError as e:
+                print(f"❌ {e}")
+                raise SystemExit(1)
+            if applied:
+                for version in applied:
+                    print(f"✅ Applied migration {version}")
+            else:
+                print("✅ Database schema is up to date")
+
+        elif args.command == 'status':
+            with engine.begin() as conn:
+                version = current_version(conn)
+            for number, description, _ in sorted(MIGRATIONS, key=lambda m: m[0]):
+                marker = "✅" if number <= version else "⏳"
+                print(f"{marker} {number:03d} {description}")
+
+        else:
+            problems = check_schema(engine, db.metadata)
+            if problems:
+                print("❌ Database schema differs from models.py:")
+                for problem in problems:
+                    print(f"   - {problem}")
+                sys.exit(1)
+            print("✅ Database schema matches models.py")
+
+
+if __name__ == "__main__":
+    main()
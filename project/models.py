@@ -6,15 +6,43 @@ from werkzeug.security import generate_password_hash, check_password_hash
 db = SQLAlchemy()
 
 class Student(UserMixin, db.Model):
+    __tablename__ = 'students'
+    __table_args__ = (
+        # Matches the filters used by the dashboard and bulk pass operations
+        db.Index('idx_students_dept_year_active', 'department', 'year', 'is_active'),
+        db.Index('idx_students_active_created', 'is_active', 'created_at'),
+        db.Index('idx_students_token_rotated', 'token_rotated_at'),
+        db.Index('idx_students_route', 'route_id'),
+        db.Index('idx_students_bus', 'bus_id'),
+        db.Index('idx_students_updated', 'updated_at'),
+        # Lets the expiry sweeper find active passes past their end date without a full scan
+        db.Index('idx_students_active_valid_until', 'is_active', 'valid_until'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     reg_no = db.Column(db.String(20), unique=True, nullable=False)
     name = db.Column(db.String(100), nullable=False)
     department = db.Column(db.String(50), nullable=False)
     year = db.Column(db.String(10), nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    # Deferred: loaded on first access, so load_user and other entity loads skip them
+    password_hash = db.deferred(db.Column(db.String(255), nullable=False))
     is_active = db.Column(db.Boolean, default=True)
-    qr_code_path = db.Column(db.String(200))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    qr_code_path = db.deferred(db.Column(db.String(200)), group='pass_card')
+    # QR token rotation: scans carrying the current or previous token are accepted
+    pass_token = db.Column(db.String(64))
+    previous_pass_token = db.Column(db.String(64))
+    token_generation = db.Column(db.Integer, nullable=False, default=0)
+    token_rotated_at = db.Column(db.DateTime)
+    # The pass is valid on this route, and only on this bus when one is assigned
+    route_id = db.Column(db.Integer, db.ForeignKey('routes.id', ondelete='SET NULL'))
+    bus_id = db.Column(db.Integer, db.ForeignKey('buses.id', ondelete='SET NULL'))
+    # Inclusive validity window; a missing bound leaves that side open
+    valid_from = db.Column(db.Date)
+    valid_until = db.Column(db.Date)
+    # Set when expire_passes.py deactivated the pass, so renewal can tell it from a revocation
+    expired_at = db.Column(db.DateTime)
+    created_at = db.deferred(db.Column(db.DateTime, default=datetime.utcnow), group='pass_card')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -22,6 +50,9 @@ class Student(UserMixin, db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    route = db.relationship('Route')
+    bus = db.relationship('Bus')
+    
     def get_id(self):
         return str(self.id)
     
@@ -35,9 +66,13 @@ class Student(UserMixin, db.Model):
         }
 
 class Admin(UserMixin, db.Model):
+    __tablename__ = 'admins'
+
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -46,4 +81,65 @@ class Admin(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
     
     def get_id(self):
-        return f"admin_{self.id}"
\ No newline at end of file
+        return f"admin_{self.id}"
+
+class Route(db.Model):
+    __tablename__ = 'routes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(20), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Bus(db.Model):
+    __tablename__ = 'buses'
+    __table_args__ = (
+        db.Index('idx_buses_route', 'route_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    number = db.Column(db.String(20), unique=True, nullable=False)
+    route_id = db.Column(db.Integer, db.ForeignKey('routes.id', ondelete='CASCADE'), nullable=False)
+    capacity = db.Column(db.Integer, nullable=False)
+    # Boardings since the last reset; written periodically from the in-memory counters
+    occupancy = db.Column(db.Integer, nullable=False, default=0)
+    occupancy_updated_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    route = db.relationship('Route', backref='buses')
+
+SCAN_STATUSES = ('valid', 'invalid', 'blocked', 'expired', 'not_yet_valid')
+
+class PassScan(db.Model):
+    """Scan history, RANGE partitioned by month on scanned_at in MySQL.
+
+    Partitioned InnoDB tables cannot have foreign keys and every unique key must
+    include the partitioning column, hence the (id, scanned_at) primary key and
+    the unconstrained student_id. Partitions are managed by scan_partitions.py.
+    """
+    __tablename__ = 'pass_scans'
+    __table_args__ = (
+        db.Index('idx_student_id', 'student_id'),
+        db.Index('idx_scanned_at', 'scanned_at'),
+        # Makes re-uploads of an offline scan a no-op; includes scanned_at for partitioning
+        db.Index('uq_pass_scans_client', 'client_id', 'scanned_at', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    scanned_at = db.Column(db.DateTime, primary_key=True, default=datetime.utcnow)
+    student_id = db.Column(db.Integer, nullable=False)
+    scanner_info = db.Column(db.String(200))
+    status = db.Column(db.Enum(*SCAN_STATUSES, name='scan_status'), nullable=False)
+    # Id the scanner gave an offline scan, unset for live scans
+    client_id = db.Column(db.String(64))
+
+class ScanDailySummary(db.Model):
+    """Per-day scan counts kept after old pass_scans partitions are dropped"""
+    __tablename__ = 'scan_daily_summaries'
+
+    scan_date = db.Column(db.Date, primary_key=True)
+    student_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    scan_count = db.Column(db.Integer, nullable=False)
+    first_scan_at = db.Column(db.DateTime)
+    last_scan_at = db.Column(db.DateTime)
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select, update
+
+from models import db, Bus
+from resilience import DATABASE_ERRORS, DatabaseUnavailable
+
+
+class OccupancyTracker:
+    """Live per-bus boarding counters.
+
+    Valid scans increment an in-memory counter; a background thread adds the
+    accumulated deltas to buses.occupancy every flush_seconds. Because only
+    deltas are written, every worker process can keep its own counters and the
+    database total stays correct. Dashboards read buses.occupancy plus this
+    worker's unflushed deltas instead of counting scan history.
+
+    The small buses table is also cached here (number -> id, route) so the
+    wrong-bus check adds no query to a scan. Reloads go through the
+    verification circuit breaker, so a failing database is not queried for it
+    on every scan.
+    """
+
+    def __init__(self, app, flush_seconds=10, directory_ttl=60, breaker=None):
+        self.app = app
+        self.flush_seconds = flush_seconds
+        self.directory_ttl = directory_ttl
+        self.breaker = breaker
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        # Serialises flushes and resets so a reset is never followed by an older delta
+        self._write_lock = threading.Lock()
+        self._buses = None
+        self._buses_loaded_at = None
+        self._flusher = None
+
+    def bus(self, number):
+        """Return (bus_id, route_id) for a bus number, or None if unknown.
+
+        Raises DatabaseUnavailable if the directory was never loaded and the
+        database cannot be used now.
+        """
+        now = time.monotonic()
+        if self._buses_loaded_at is None or now - self._buses_loaded_at > self.directory_ttl:
+            if self.breaker is None or self.breaker.allow():
+                self._load_directory()
+            if self._buses is None:
+                raise DatabaseUnavailable()
+            # Keep checking against the last directory until the database is back
+            self._buses_loaded_at = now
+        return self._buses.get(number)
+
+    def _load_directory(self):
+        try:
+            rows = db.session.execute(select(Bus.number, Bus.id, Bus.route_id)).all()
+        except DATABASE_ERRORS:
+            db.session.rollback()
+            self.app.logger.warning("Could not load the bus directory")
+            if self.breaker is not None:
+                self.breaker.record_failure()
+        else:
+            self._buses = {row.number: (row.id, row.route_id) for row in rows}
+            if self.breaker is not None:
+                self.breaker.record_success()
+
+    def invalidate(self):
+        """Reload the bus directory on next use, e.g. after buses are edited"""
+        self._buses_loaded_at = None
+
+    def record(self, bus_id):
+        """Count one boarding on a bus"""
+        with self._lock:
+            self._pending[bus_id] += 1
+        if self._flusher is None:
+            self._start_flusher()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def reset(self, bus_id):
+        """Zero a bus's occupancy and drop this worker's unflushed boardings for it.
+
+        Runs under the flush lock, so a flush that already took the pending
+        deltas finishes first instead of adding them back afterwards.
+        """
+        with self._write_lock:
+            with self._lock:
+                self._pending.pop(bus_id, None)
+            db.session.execute(
+                update(Bus).where(Bus.id == bus_id)
+                .values(occupancy=0, occupancy_updated_at=datetime.utcnow())
+            )
+            db.session.commit()
+
+    def flush(self):
+        """Add pending deltas to buses.occupancy; returns the number of buses written"""
+        with self._write_lock:
+            return self._flush()
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+        if not pending:
+            return 0
+
+        now = datetime.utcnow()
+        try:
+            for bus_id, delta in pending.items():
+                db.session.execute(
+                    update(Bus).where(Bus.id == bus_id)
+                    .values(occupancy=Bus.occupancy + delta, occupancy_updated_at=now)
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Keep the boardings for the next attempt
+            with self._lock:
+                for bus_id, delta in pending.items():
+                    self._pending[bus_id] += delta
+            raise
+        return len(pending)
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name='occupancy-flush', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            with self.app.app_context():
+                try:
+                    self.flush()
+                except Exception:
+                    self.app.logger.exception("Failed to write bus occupancy")
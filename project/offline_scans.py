@@ -0,0 +1,116 @@
+import json
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert, select
+
+from models import db, PassScan
+from queries import passes_by_reg_no
+from verification import pass_problem, valid_result
+
+# Scanner clocks drift; scans stamped further ahead than this are rejected
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+# Older scans are a broken clock or a queue that will never be trusted
+MAX_SCAN_AGE = timedelta(days=30)
+# Gate labels are stored in scanner_info, a VARCHAR(200)
+MAX_GATE_LENGTH = 50
+
+
+def stored_scans_query(client_ids, earliest, latest):
+    # Bounding scanned_at lets MySQL prune pass_scans partitions
+    return (
+        select(PassScan.client_id, PassScan.scanned_at, PassScan.status)
+        .where(PassScan.client_id.in_(client_ids), PassScan.scanned_at.between(earliest, latest))
+    )
+
+
+def parse_scanned_at(value):
+    """ISO 8601 timestamp from a scanner as naive UTC, like the rest of the schema.
+
+    Truncated to whole seconds, as stored by DATETIME, so a retried scan
+    compares equal to the stored one.
+    """
+    scanned_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if scanned_at.tzinfo is not None:
+        scanned_at = scanned_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return scanned_at.replace(microsecond=0)
+
+
+def ingest(scans):
+    """Evaluate and record a batch of scans captured while a scanner was offline.
+
+    Each scan is {client_id, qr_data, scanned_at, gate}. A scan with a bad
+    field is answered with an error on its own, so it can never fail the batch
+    and block the rest of a scanner's queue. Scans already stored
+    under the same client_id and scanned_at are reported with their stored
+    status and not written again, so a scanner can retry a batch safely. All
+    passes are resolved in one query and all new scans are written in one
+    transaction. Returns one result per scan, in order.
+    """
+    now = datetime.utcnow()
+    results = [None] * len(scans)
+    parsed = []  # (position, client_id, scanned_at, gate, student_data)
+    for position, scan in enumerate(scans):
+        try:
+            client_id = scan['client_id']
+            if not isinstance(client_id, str) or not 0 < len(client_id) <= 64:
+                raise ValueError(client_id)
+            scanned_at = parse_scanned_at(scan['scanned_at'])
+            student_data = json.loads(scan['qr_data'])
+            if not isinstance(student_data.get('reg_no'), str):
+                raise ValueError(student_data)
+            gate = scan.get('gate')
+            if gate is not None and (not isinstance(gate, str) or len(gate) > MAX_GATE_LENGTH):
+                raise ValueError(gate)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            # Echo the id back so the scanner can drop a scan that will never be accepted
+            client_id = scan.get('client_id') if isinstance(scan, dict) else None
+            results[position] = {'client_id': client_id, 'status': 'error', 'message': 'Malformed scan'}
+            continue
+        if scanned_at > now + MAX_CLOCK_SKEW:
+            results[position] = {'client_id': client_id, 'status': 'error', 'message': 'Scan time is in the future'}
+            continue
+        if scanned_at < now - MAX_SCAN_AGE:
+            results[position] = {'client_id': client_id, 'status': 'error', 'message': 'Scan is too old'}
+            continue
+        parsed.append((position, client_id, scanned_at, gate, student_data))
+
+    if not parsed:
+        return results
+
+    stored = {
+        (row.client_id, row.scanned_at): row.status
+        for row in db.session.execute(stored_scans_query({item[1] for item in parsed},
+                                                         min(item[2] for item in parsed),
+                                                         max(item[2] for item in parsed)))
+    }
+    students = passes_by_reg_no({item[4]['reg_no'] for item in parsed})
+
+    rows = []
+    for position, client_id, scanned_at, gate, student_data in parsed:
+        key = (client_id, scanned_at)
+        if key in stored:
+            results[position] = {'client_id': client_id, 'status': stored[key], 'already_recorded': True}
+            continue
+
+        student = students.get(student_data['reg_no'])
+        result = pass_problem(student, student_data, scanned_at.date()) or valid_result(student)
+        result['client_id'] = client_id
+        results[position] = result
+        # Scan history is per student; scans of unknown passes are only reported
+        if student is not None:
+            stored[key] = result['status']
+            rows.append({
+                'client_id': client_id,
+                'scanned_at': scanned_at,
+                'student_id': student.id,
+                'scanner_info': f"offline gate {gate}" if gate else "offline",
+                'status': result['status'],
+            })
+
+    if rows:
+        # IGNORE covers a retry racing the original upload past the pre-check
+        db.session.execute(
+            insert(PassScan).prefix_with('IGNORE', dialect='mysql').prefix_with('OR IGNORE', dialect='sqlite'),
+            rows
+        )
+        db.session.commit()
+    return results
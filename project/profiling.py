@@ -0,0 +1,184 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from flask import g, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# The profile of the request being handled in this thread, if any
+_active_profile = ContextVar('active_profile', default=None)
+
+REPORT_NAME = re.compile(r'^profile-\d{3}\.json$')
+
+
+class ProfileStore:
+    """Fixed-size ring of JSON profile reports on disk; the oldest file is overwritten"""
+
+    def __init__(self, directory, size):
+        self.directory = directory
+        self.size = size
+
+    def _path(self, slot):
+        return os.path.join(self.directory, f"profile-{slot:03d}.json")
+
+    def _next_slot(self):
+        oldest_slot, oldest_mtime = 0, None
+        for slot in range(self.size):
+            try:
+                mtime = os.path.getmtime(self._path(slot))
+            except OSError:
+                return slot
+            if oldest_mtime is None or mtime < oldest_mtime:
+                oldest_slot, oldest_mtime = slot, mtime
+        return oldest_slot
+
+    def save(self, report):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(self._next_slot())
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(report, f)
+        os.replace(temp_path, path)
+        return os.path.basename(path)
+
+    def load(self, name):
+        if not REPORT_NAME.match(name):
+            return None
+        try:
+            with open(os.path.join(self.directory, name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list(self):
+        """Report summaries, newest first"""
+        reports = []
+        for slot in range(self.size):
+            name = os.path.basename(self._path(slot))
+            report = self.load(name)
+            if report:
+                report.pop('profile', None)
+                report['name'] = name
+                report['sql_count'] = len(report.pop('sql', []))
+                reports.append(report)
+        return sorted(reports, key=lambda r: r['started_at'], reverse=True)
+
+
+class RequestProfiler:
+    """Opt-in per-request profiler.
+
+    When PROFILING_ENABLED is false nothing is registered, so inactive
+    deployments pay no overhead. When enabled, a PROFILING_SAMPLE_RATE
+    fraction of requests, plus any admin request carrying PROFILING_HEADER,
+    is run under cProfile with its SQL statements captured, and the report is
+    written to the on-disk ring in PROFILE_DIR.
+    """
+
+    def __init__(self, app=None):
+        self.store = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['profiler'] = self
+        if not app.config['PROFILING_ENABLED']:
+            return
+
+        self.sample_rate = app.config['PROFILING_SAMPLE_RATE']
+        self.header = app.config['PROFILING_HEADER']
+        self.store = ProfileStore(app.config['PROFILE_DIR'], app.config['PROFILE_RING_SIZE'])
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def _trigger(self):
+        if request.endpoint == 'static':
+            return None
+        if request.headers.get(self.header):
+            from models import Admin
+            if isinstance(current_user._get_current_object(), Admin):
+                return 'header'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def _start(self):
+        trigger = self._trigger()
+        if trigger is None:
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another request in this interpreter is already being profiled
+            return
+        g._profile = {
+            'profiler': profiler,
+            'trigger': trigger,
+            'started_at': datetime.utcnow().isoformat(),
+            'start': time.perf_counter(),
+            'sql': [],
+        }
+        g._profile_token = _active_profile.set(g._profile)
+
+    def _finish(self, response):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return response
+
+        profile['profiler'].disable()
+        _active_profile.reset(g.pop('_profile_token'))
+
+        stats_text = io.StringIO()
+        stats = pstats.Stats(profile['profiler'], stream=stats_text)
+        stats.sort_stats('cumulative').print_stats(40)
+
+        report_name = self.store.save({
+            'started_at': profile['started_at'],
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'trigger': profile['trigger'],
+            'duration_ms': round((time.perf_counter() - profile['start']) * 1000, 2),
+            'sql': profile['sql'],
+            'profile': stats_text.getvalue(),
+        })
+        if profile['trigger'] == 'header':
+            response.headers['X-Profile-Report'] = report_name
+        return response
+
+    def _teardown(self, exc):
+        # Requests that raised never reach after_request
+        profile = g.pop('_profile', None)
+        if profile is not None:
+            profile['profiler'].disable()
+            _active_profile.reset(g.pop('_profile_token'))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_profile.get() is not None:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    if profile is not None and conn.info.get('profile_query_start'):
+        elapsed = time.perf_counter() - conn.info['profile_query_start'].pop()
+        profile['sql'].append({
+            'statement': statement,
+            'duration_ms': round(elapsed * 1000, 2),
+        })
@@ -0,0 +1,58 @@
+import json
+import os
+import secrets
+from datetime import datetime
+from flask import current_app
+
+
+def new_pass_token():
+    """Random token embedded in a pass QR code; replaced on every rotation"""
+    return secrets.token_urlsafe(16)
+
+
+def build_pass_payload(student_data):
+    """JSON text encoded in a student's pass QR code"""
+    qr_data = {
+        'reg_no': student_data['reg_no'],
+        'name': student_data['name'],
+        'department': student_data['department'],
+        'year': student_data['year'],
+        'timestamp': datetime.now().isoformat()
+    }
+    if student_data.get('pass_token'):
+        qr_data['token'] = student_data['pass_token']
+        qr_data['gen'] = student_data['token_generation']
+    return json.dumps(qr_data)
+
+
+def render_qr(payload, qr_path):
+    """Render a QR image to qr_path.
+
+    Needs no application context, so the rotation job can run it in worker
+    processes. The file is replaced atomically so a pass is never half-written.
+    """
+    # qrcode pulls in PIL, so it is only imported once a pass is actually rendered
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    temp_path = f"{qr_path}.{os.getpid()}.tmp"
+    img.save(temp_path, format='PNG')
+    os.replace(temp_path, qr_path)
+
+
+def qr_filename_for(reg_no):
+    return f"{reg_no}_pass.png"
+
+
+def generate_qr_code(student_data):
+    """Generate QR code for student pass"""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    os.makedirs(upload_folder, exist_ok=True)
+    qr_filename = qr_filename_for(student_data['reg_no'])
+    render_qr(build_pass_payload(student_data), os.path.join(upload_folder, qr_filename))
+
+    return qr_filename
@@ -0,0 +1,111 @@
+"""Column-projected reads for the hot request paths.
+
+Each query selects only the columns its caller uses and returns small
+__slots__ records, so no ORM identity map entries, instance state or unused
+columns such as the password hash are built per row. Use the Student model
+when a row is going to be changed. The *_query functions build the statements
+without running them, so explain_check.py checks the exact queries the app runs.
+"""
+
+from sqlalchemy import select
+
+from models import db, Student, Admin, Bus, Route
+
+
+class Record:
+    """Read-only row with named fields and no per-instance __dict__"""
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class PassRecord(Record):
+    """Everything verification needs about a pass"""
+
+    __slots__ = ('id', 'reg_no', 'name', 'department', 'year', 'is_active', 'pass_token',
+                 'previous_pass_token', 'bus_id', 'route_id', 'valid_from', 'valid_until',
+                 'updated_at')
+
+
+class DashboardStudent(Record):
+    """One row of the admin dashboard student table"""
+
+    __slots__ = ('id', 'reg_no', 'name', 'department', 'year', 'is_active', 'qr_code_path',
+                 'token_generation', 'created_at', 'bus_number', 'route_code')
+
+
+PASS_COLUMNS = tuple(getattr(Student, name) for name in PassRecord.__slots__)
+
+
+def pass_query(reg_no, timeout_ms=None):
+    """On MySQL, timeout_ms caps the query with a MAX_EXECUTION_TIME hint"""
+    query = select(*PASS_COLUMNS).where(Student.reg_no == reg_no)
+    if timeout_ms:
+        query = query.prefix_with(f'/*+ MAX_EXECUTION_TIME({timeout_ms}) */', dialect='mysql')
+    return query
+
+
+def pass_by_reg_no(reg_no, timeout_ms=None):
+    """PassRecord for a registration number, or None"""
+    row = db.session.execute(pass_query(reg_no, timeout_ms)).first()
+    return PassRecord(*row) if row is not None else None
+
+
+def passes_query(reg_nos):
+    return select(*PASS_COLUMNS).where(Student.reg_no.in_(reg_nos))
+
+
+def passes_by_reg_no(reg_nos):
+    """PassRecords for many registration numbers in one query, keyed by reg_no"""
+    if not reg_nos:
+        return {}
+    rows = db.session.execute(passes_query(reg_nos))
+    return {record.reg_no: record for record in (PassRecord(*row) for row in rows)}
+
+
+def passes_changed_query(since=None):
+    query = select(*PASS_COLUMNS)
+    if since is not None:
+        query = query.where(Student.updated_at >= since)
+    return query
+
+
+def passes_changed_since(since=None):
+    """PassRecords updated at or after since, or all of them"""
+    return [PassRecord(*row) for row in db.session.execute(passes_changed_query(since))]
+
+
+def student_login_query(reg_no):
+    """Student entity with its password hash, for a login attempt"""
+    return select(Student).options(db.undefer(Student.password_hash)).where(Student.reg_no == reg_no)
+
+
+def admin_login_query(username):
+    return select(Admin).where(Admin.username == username)
+
+
+def dashboard_students():
+    """DashboardStudents with their bus number and route code"""
+    rows = db.session.execute(
+        select(Student.id, Student.reg_no, Student.name, Student.department, Student.year,
+               Student.is_active, Student.qr_code_path, Student.token_generation, Student.created_at,
+               Bus.number, Route.code)
+        .outerjoin(Bus, Student.bus_id == Bus.id)
+        .outerjoin(Route, Student.route_id == Route.id)
+    )
+    return [DashboardStudent(*row) for row in rows]
+
+
+def is_taken(column, value):
+    """True if any row already has value in a unique column"""
+    return db.session.execute(select(column).where(column == value).limit(1)).first() is not None
@@ -0,0 +1,180 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeout
+
+from models import db
+from queries import pass_by_reg_no, passes_changed_since
+
+DATABASE_ERRORS = (DBAPIError, PoolTimeout)
+
+
+class DatabaseUnavailable(Exception):
+    """Raised when the database cannot be used and no snapshot is loaded yet"""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker around database lookups.
+
+    After failure_threshold consecutive failures the breaker opens and callers
+    skip the database for reset_seconds. A single trial call is then let
+    through (half-open): success closes the breaker, failure opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_seconds=30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if the caller may use the database now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        """Returns True if this closed the breaker"""
+        with self._lock:
+            recovered = self.state != self.CLOSED
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+            return recovered
+
+    def record_failure(self):
+        """Returns True if this opened the breaker"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.OPEN:
+                return False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+                self.trips += 1
+                return True
+            return False
+
+
+class PassLookup:
+    """Student lookup for verification that keeps answering when MySQL does not.
+
+    Each lookup carries a MAX_EXECUTION_TIME hint of query_timeout_ms, and a
+    lookup that errors or runs longer than that counts as a failure of the
+    breaker. While the breaker is open, lookups are answered from a snapshot of
+    every pass held in memory and flagged stale. The snapshot is loaded in the
+    background on first use, refreshed from rows whose updated_at moved every
+    refresh_seconds while the database is healthy, and updated by every
+    successful lookup.
+    """
+
+    def __init__(self, app, breaker, query_timeout_ms=500, refresh_seconds=60):
+        self.app = app
+        self.breaker = breaker
+        self.query_timeout_ms = query_timeout_ms
+        self.refresh_seconds = refresh_seconds
+        self.stale_served = 0
+        self._snapshot = {}  # reg_no -> PassRecord
+        self._synced_at = None
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def find(self, reg_no):
+        """Return (PassRecord or None, stale) for a registration number"""
+        if self._refresher is None:
+            self._start_refresher()
+
+        if self.breaker.allow():
+            started = time.perf_counter()
+            try:
+                record = pass_by_reg_no(reg_no, timeout_ms=self.query_timeout_ms)
+            except DATABASE_ERRORS:
+                db.session.rollback()
+                self._failed("Pass lookup failed")
+            else:
+                # Backends without the hint are still judged by how long the query took
+                if (time.perf_counter() - started) * 1000 > self.query_timeout_ms:
+                    self._failed("Pass lookup was slow")
+                elif self.breaker.record_success():
+                    self.app.logger.warning("Database recovered, verification circuit closed")
+                self._remember(reg_no, record)
+                return record, False
+
+        with self._lock:
+            if self._synced_at is None:
+                raise DatabaseUnavailable()
+            self.stale_served += 1
+            return self._snapshot.get(reg_no), True
+
+    def metrics(self):
+        with self._lock:
+            age = (datetime.utcnow() - self._synced_at).total_seconds() if self._synced_at else None
+            return {
+                'breaker_state': self.breaker.state,
+                'consecutive_failures': self.breaker.failures,
+                'breaker_trips': self.breaker.trips,
+                'stale_answers_served': self.stale_served,
+                'snapshot_size': len(self._snapshot),
+                'snapshot_age_seconds': round(age, 1) if age is not None else None,
+            }
+
+    def refresh(self):
+        """Load the whole snapshot, or only rows changed since the last refresh"""
+        started_at = datetime.utcnow()
+        since = None
+        if self._synced_at is not None:
+            # Overlap slightly so rows committed while the last refresh ran are not missed
+            since = self._synced_at - timedelta(seconds=self.refresh_seconds)
+        records = passes_changed_since(since)
+        with self._lock:
+            if self._synced_at is None:
+                self._snapshot = {record.reg_no: record for record in records}
+            else:
+                self._snapshot.update((record.reg_no, record) for record in records)
+            self._synced_at = started_at
+
+    def _remember(self, reg_no, record):
+        with self._lock:
+            if record is not None:
+                self._snapshot[reg_no] = record
+            else:
+                self._snapshot.pop(reg_no, None)
+
+    def _failed(self, message):
+        if self.breaker.record_failure():
+            self.app.logger.error(f"{message}; verification circuit opened, serving passes from snapshot")
+
+    def _start_refresher(self):
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, name='pass-snapshot', daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            # Leave the database alone while it is failing; the snapshot is all we have
+            if self.breaker.state == CircuitBreaker.CLOSED:
+                with self.app.app_context():
+                    try:
+                        self.refresh()
+                    except DATABASE_ERRORS:
+                        db.session.rollback()
+                        self._failed("Pass snapshot refresh failed")
+                    except Exception:
+                        self.app.logger.exception("Failed to refresh the pass snapshot")
+            time.sleep(self.refresh_seconds)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+QR Pass Rotation Job for College Bus Pass Authenticator System
+Reissues the token embedded in each active pass once it is older than
+QR_ROTATION_PERIOD_HOURS and re-renders the pass image on a process pool, so a
+screenshot of a pass stops scanning after two rotation periods. Verification
+accepts the current and previous token generation.
+
+Progress is checkpointed to QR_ROTATION_STATE_FILE: an interrupted run resumes
+with the same cutoff and re-renders any batch whose tokens were committed but
+whose images were not yet written. On MySQL a run holds a named lock, so a
+cron run that overlaps a long --every run skips instead of rotating the same
+passes twice. Run it from cron or with --every, outside the web workers:
+
+    */30 * * * * cd /path/to/project && python rotate_passes.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, or_, select, text, update
+
+from app import create_app
+from models import db, Student
+from qr_codes import build_pass_payload, new_pass_token, qr_filename_for, render_qr
+
+ROTATION_COLUMNS = (Student.id, Student.reg_no, Student.name, Student.department, Student.year)
+ROTATION_LOCK = 'bus_pass_rotation'
+
+# Only rows still carrying the token that was read are rotated, so a run that
+# lost a race to another one skips them instead of orphaning their images
+ROTATE_TOKEN = (
+    update(Student.__table__)
+    .where(Student.id == bindparam('row_id'),
+           Student.pass_token.is_not_distinct_from(bindparam('read_token')))
+    .values(pass_token=bindparam('new_token'), previous_pass_token=bindparam('read_token'),
+            token_generation=Student.token_generation + 1, token_rotated_at=bindparam('now'))
+)
+
+
+@contextmanager
+def rotation_lock(engine):
+    """Hold the MySQL named rotation lock; yields False if another run has it.
+
+    Other backends are only used for development and are not locked.
+    """
+    if engine.dialect.name != 'mysql':
+        yield True
+        return
+    # A dedicated connection, since the lock belongs to the connection that took it
+    with engine.connect() as conn:
+        acquired = conn.execute(text("SELECT GET_LOCK(:name, 0)"), {'name': ROTATION_LOCK}).scalar() == 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {'name': ROTATION_LOCK})
+
+
+def load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(path, state):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(temp_path, path)
+
+
+def due_students_query(cutoff, limit):
+    return (
+        select(*ROTATION_COLUMNS, Student.pass_token, Student.token_generation)
+        .where(or_(Student.token_rotated_at.is_(None), Student.token_rotated_at < cutoff),
+               Student.is_active == True)
+        .order_by(Student.token_rotated_at, Student.id)
+        .limit(limit)
+    )
+
+
+def due_students(cutoff, limit):
+    """Active students whose token was issued before the cutoff, oldest first"""
+    return db.session.execute(due_students_query(cutoff, limit)).all()
+
+
+def render_batch(pool, upload_folder, ids):
+    """Render the committed token of each student in ids across the worker pool"""
+    rows = db.session.execute(
+        select(*ROTATION_COLUMNS, Student.pass_token, Student.token_generation)
+        .where(Student.id.in_(ids))
+    ).all()
+    jobs = [
+        (build_pass_payload(row._asdict()), os.path.join(upload_folder, qr_filename_for(row.reg_no)))
+        for row in rows
+    ]
+    if jobs:
+        # list() re-raises the first rendering error, leaving the batch pending
+        list(pool.map(render_qr, *zip(*jobs), chunksize=16))
+
+
+def rotate(state, state_file, pool, upload_folder, batch_size):
+    """Rotate every due pass, checkpointing after each batch; returns the count rotated"""
+    cutoff = datetime.fromisoformat(state['cutoff'])
+
+    if state.get('pending'):
+        print(f"🔄 Re-rendering {len(state['pending'])} passes from the interrupted batch...")
+        render_batch(pool, upload_folder, state['pending'])
+        state['pending'] = []
+        save_state(state_file, state)
+
+    while True:
+        students = due_students(cutoff, batch_size)
+        if not students:
+            return state['rotated']
+
+        now = datetime.utcnow()
+        updates = [{
+            'row_id': student.id,
+            'read_token': student.pass_token,
+            'new_token': new_pass_token(),
+            'now': now,
+        } for student in students]
+
+        # Tokens are committed before the images are rewritten: until then the
+        # old image carries what is now the previous token, which still scans
+        state['pending'] = [student.id for student in students]
+        save_state(state_file, state)
+        db.session.execute(ROTATE_TOKEN, updates)
+        db.session.commit()
+
+        render_batch(pool, upload_folder, state['pending'])
+        state['rotated'] += len(students)
+        state['pending'] = []
+        save_state(state_file, state)
+        print(f"   ✅ {state['rotated']} passes rotated")
+
+
+def run_once(app, args):
+    with rotation_lock(db.engine) as acquired:
+        if not acquired:
+            print("⏭️  Another rotation is running, skipping this one")
+            return
+        rotate_due(app, args)
+
+
+def rotate_due(app, args):
+    state_file = app.config['QR_ROTATION_STATE_FILE']
+    state = None if args.restart else load_state(state_file)
+    if state:
+        print(f"⏯️  Resuming rotation started {state['started_at']} ({state['rotated']} done)")
+    else:
+        hours = args.period_hours if args.period_hours is not None else app.config['QR_ROTATION_PERIOD_HOURS']
+        period = timedelta(hours=hours)
+        started_at = datetime.utcnow()
+        state = {
+            'started_at': started_at.isoformat(),
+            'cutoff': (started_at - period).isoformat(),
+            'rotated': 0,
+            'pending': [],
+        }
+        save_state(state_file, state)
+
+    upload_folder = app.config['UPLOAD_FOLDER']
+    os.makedirs(upload_folder, exist_ok=True)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers or app.config['QR_ROTATION_WORKERS']) as pool:
+        rotated = rotate(state, state_file, pool, upload_folder,
+                         args.batch_size or app.config['QR_ROTATION_BATCH_SIZE'])
+    os.remove(state_file)
+    print(f"🎉 Rotated {rotated} passes in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Reissue QR pass tokens that are due for rotation")
+    parser.add_argument('--period-hours', type=float, help="rotate tokens older than this")
+    parser.add_argument('--batch-size', type=int)
+    parser.add_argument('--workers', type=int, help="image rendering processes")
+    parser.add_argument('--restart', action='store_true', help="ignore any saved progress")
+    parser.add_argument('--every', type=float, metavar='MINUTES',
+                        help="keep running and start a rotation every MINUTES")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        while True:
+            try:
+                run_once(app, args)
+            except KeyboardInterrupt:
+                print("⏸️  Interrupted, progress saved; run again to resume")
+                sys.exit(1)
+            if not args.every:
+                break
+            args.restart = False
+            time.sleep(args.every * 60)
+
+
+if __name__ == "__main__":
+    main()
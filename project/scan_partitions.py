@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Scan History Partition Maintenance for College Bus Pass Authenticator System
+pass_scans is RANGE partitioned by month on scanned_at (MySQL). This job keeps
+SCAN_PARTITION_MONTHS_AHEAD empty partitions ready for new scans and, for every
+month older than SCAN_RETENTION_MONTHS, rolls the partition up into
+scan_daily_summaries and drops it. Dropping a partition is a metadata operation,
+so old scans go away without long DELETEs that lock the table.
+
+Usage (daily from cron):
+    python scan_partitions.py maintain
+    python scan_partitions.py list
+"""
+
+import argparse
+import os
+import re
+from datetime import date, datetime
+from sqlalchemy import text
+
+PARTITION_NAME = re.compile(r'^p(\d{4})(\d{2})$')
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def partition_clause(month):
+    """Partition holding the scans of one month"""
+    return (f"PARTITION {partition_name(month)} VALUES LESS THAN "
+            f"(TO_DAYS('{add_months(month, 1).isoformat()}'))")
+
+
+def is_partitioned(conn):
+    return conn.execute(text("""
+        SELECT COUNT(*) FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'pass_scans'
+          AND PARTITION_NAME IS NOT NULL
+    """)).scalar() > 0
+
+
+def monthly_partitions(conn):
+    """Months that currently have a partition, oldest first"""
+    names = conn.execute(text("""
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'pass_scans'
+          AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """)).scalars()
+    months = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return months
+
+
+def ensure_future_partitions(conn, months_ahead, today=None):
+    """Split the catch-all pmax partition so each coming month has its own; returns names added"""
+    current = month_start(today or date.today())
+    existing = monthly_partitions(conn)
+    start = add_months(existing[-1], 1) if existing else current
+    added = []
+    month = start
+    while month <= add_months(current, months_ahead):
+        # pmax stays empty while future months exist, so this split copies no rows
+        conn.execute(text(
+            f"ALTER TABLE pass_scans REORGANIZE PARTITION pmax INTO "
+            f"({partition_clause(month)}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+        ))
+        added.append(partition_name(month))
+        month = add_months(month, 1)
+    return added
+
+
+def rollup_and_drop(conn, retention_months, today=None):
+    """Summarise and drop every month older than the retention period; returns names dropped"""
+    oldest_kept = add_months(month_start(today or date.today()), -retention_months)
+    dropped = []
+    for month in monthly_partitions(conn):
+        if month >= oldest_kept:
+            break
+        name = partition_name(month)
+        # Counts are assigned rather than added, so re-running after an
+        # interruption between the rollup and the drop gives the same totals
+        conn.execute(text(f"""
+            INSERT INTO scan_daily_summaries
+                (scan_date, student_id, status, scan_count, first_scan_at, last_scan_at)
+            SELECT DATE(scanned_at), student_id, status, COUNT(*), MIN(scanned_at), MAX(scanned_at)
+            FROM pass_scans PARTITION ({name})
+            GROUP BY DATE(scanned_at), student_id, status
+            ON DUPLICATE KEY UPDATE
+                scan_count = VALUES(scan_count),
+                first_scan_at = VALUES(first_scan_at),
+                last_scan_at = VALUES(last_scan_at)
+        """))
+        conn.commit()
+        conn.execute(text(f"ALTER TABLE pass_scans DROP PARTITION {name}"))
+        dropped.append(name)
+    return dropped
+
+
+def partition_table(conn, months_ahead, today=None):
+    """Convert an unpartitioned pass_scans table to monthly partitions"""
+    current = month_start(today or date.today())
+    oldest = conn.execute(text("SELECT MIN(scanned_at) FROM pass_scans")).scalar()
+    month = month_start(oldest) if oldest else current
+    clauses = []
+    while month <= add_months(current, months_ahead):
+        clauses.append(partition_clause(month))
+        month = add_months(month, 1)
+    clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    conn.execute(text(
+        "ALTER TABLE pass_scans PARTITION BY RANGE (TO_DAYS(scanned_at)) (" + ", ".join(clauses) + ")"
+    ))
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Maintain monthly pass_scans partitions")
+    parser.add_argument('command', choices=['maintain', 'list'], nargs='?', default='maintain')
+    args = parser.parse_args()
+
+    # Table rebuilds can take far longer than a web request may wait on MySQL
+    os.environ.setdefault('DB_READ_TIMEOUT_SECONDS', '0')
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        with db.engine.connect() as conn:
+            if not is_partitioned(conn):
+                print("❌ pass_scans is not partitioned; run 'python migrations.py upgrade' first")
+                raise SystemExit(1)
+
+            if args.command == 'list':
+                for month in monthly_partitions(conn):
+                    print(f"   {partition_name(month)}  {month:%B %Y}")
+                return
+
+            started = datetime.now()
+            added = ensure_future_partitions(conn, app.config['SCAN_PARTITION_MONTHS_AHEAD'])
+            dropped = rollup_and_drop(conn, app.config['SCAN_RETENTION_MONTHS'])
+            conn.commit()
+
+        for name in added:
+            print(f"✅ Created partition {name}")
+        for name in dropped:
+            print(f"🗑️  Rolled up and dropped partition {name}")
+        print(f"🎉 Partition maintenance finished in {(datetime.now() - started).total_seconds():.1f}s")
+
+
+if __name__ == "__main__":
+    main()
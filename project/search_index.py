@@ -0,0 +1,198 @@
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import select
+
+from models import db, Student
+from resilience import DATABASE_ERRORS
+
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+SEARCH_COLUMNS = (Student.id, Student.reg_no, Student.name, Student.department,
+                  Student.year, Student.is_active, Student.updated_at)
+
+
+class IndexNotReady(Exception):
+    """Raised by search() while the index is still being built or backing off"""
+
+
+def changed_students_query(since):
+    return select(*SEARCH_COLUMNS).where(Student.updated_at >= since)
+
+
+def normalize(value):
+    return NON_ALNUM.sub(' ', (value or '').lower()).strip()
+
+
+def trigrams(value):
+    """Padded trigrams of each word, so short and prefix queries still match"""
+    grams = set()
+    for word in value.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class StudentSearchIndex:
+    """In-memory trigram index over student reg_no and name.
+
+    Matches are ranked by trigram similarity, which tolerates typos, with a
+    boost for reg_no prefixes. The index is built in the background on the
+    first request, updated in place when this worker registers or changes a
+    student, and picks up changes made by other workers by re-reading rows
+    whose updated_at moved, at most every refresh_seconds.
+    """
+
+    # Postings longer than this share of all students are skipped when
+    # collecting candidates; shortlisted candidates are then scored exactly
+    COMMON_GRAM_SHARE = 0.05
+    SHORTLIST = 200
+    MIN_SCORE = 0.1
+    # A failed background build is retried after this many seconds, doubling up to the cap
+    RETRY_SECONDS = 5
+    MAX_RETRY_SECONDS = 300
+
+    def __init__(self, refresh_seconds=30):
+        self.refresh_seconds = refresh_seconds
+        self._docs = {}   # id -> result record
+        self._grams = {}  # trigram -> set of ids
+        self._doc_grams = {}
+        self._lock = threading.RLock()
+        self._built = threading.Event()
+        self._building = False
+        self._synced_at = None
+        self._checked_at = 0.0
+        self._build_failures = 0
+        self._retry_at = 0.0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _add(self, row):
+        self._remove(row.id)
+        grams = trigrams(normalize(row.reg_no)) | trigrams(normalize(row.name))
+        self._docs[row.id] = {
+            'id': row.id,
+            'reg_no': row.reg_no,
+            'name': row.name,
+            'department': row.department,
+            'year': row.year,
+            'is_active': row.is_active,
+        }
+        self._doc_grams[row.id] = grams
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(row.id)
+
+    def _remove(self, student_id):
+        for gram in self._doc_grams.pop(student_id, ()):
+            posting = self._grams[gram]
+            posting.discard(student_id)
+            if not posting:
+                del self._grams[gram]
+        self._docs.pop(student_id, None)
+
+    def build(self):
+        """Load every student into a fresh index"""
+        started_at = datetime.utcnow()
+        rows = db.session.execute(select(*SEARCH_COLUMNS)).all()
+        with self._lock:
+            self._docs, self._grams, self._doc_grams = {}, {}, {}
+            for row in rows:
+                self._add(row)
+            self._synced_at = started_at
+            self._checked_at = time.monotonic()
+        self._built.set()
+
+    def build_in_background(self, app):
+        """Start building the index without blocking the caller"""
+        if self._built.is_set() or self._building or time.monotonic() < self._retry_at:
+            return
+        with self._lock:
+            if self._building or self._built.is_set():
+                return
+            self._building = True
+
+        def run():
+            with app.app_context():
+                try:
+                    self.build()
+                    self._build_failures = 0
+                except Exception:
+                    # Back off so a failing database is not hit with a full scan per request
+                    self._build_failures += 1
+                    delay = min(self.RETRY_SECONDS * 2 ** (self._build_failures - 1), self.MAX_RETRY_SECONDS)
+                    self._retry_at = time.monotonic() + delay
+                    app.logger.exception(f"Failed to build the student search index, retrying in {delay}s")
+                finally:
+                    self._building = False
+
+        threading.Thread(target=run, name='search-index-build', daemon=True).start()
+
+    def upsert(self, student):
+        """Index a newly registered or changed student"""
+        if not self._built.is_set():
+            return
+        with self._lock:
+            self._add(student)
+
+    def sync(self):
+        """Apply rows changed by other workers since the last sync"""
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        started_at = datetime.utcnow()
+        # Overlap slightly so rows committed while the last sync ran are not missed
+        since = self._synced_at - timedelta(seconds=self.refresh_seconds)
+        try:
+            rows = db.session.execute(changed_students_query(since)).all()
+        except DATABASE_ERRORS:
+            # Keep answering from the index as it is; try again next period
+            db.session.rollback()
+            self._checked_at = time.monotonic()
+            return
+        with self._lock:
+            for row in rows:
+                self._add(row)
+            self._synced_at = started_at
+            self._checked_at = time.monotonic()
+
+    def search(self, query, limit=20):
+        """Return up to limit student records ranked by similarity to query.
+
+        Never builds the index itself; raises IndexNotReady until the
+        background build has finished.
+        """
+        if not self._built.is_set():
+            raise IndexNotReady()
+        self.sync()
+
+        text = normalize(query)
+        query_grams = trigrams(text)
+        if not query_grams:
+            return []
+        compact = text.replace(' ', '')
+
+        with self._lock:
+            postings = sorted((self._grams[gram] for gram in query_grams if gram in self._grams), key=len)
+            common = max(1000, int(len(self._docs) * self.COMMON_GRAM_SHARE))
+            selective = [posting for posting in postings if len(posting) <= common] or postings[:2]
+            hits = Counter()
+            for posting in selective:
+                hits.update(posting)
+
+            results = []
+            for student_id, _ in hits.most_common(self.SHORTLIST):
+                doc_grams = self._doc_grams[student_id]
+                shared = len(query_grams & doc_grams)
+                score = shared / (len(query_grams) + len(doc_grams) - shared)
+                reg_no = self._docs[student_id]['reg_no'].lower()
+                if reg_no == compact:
+                    score += 2
+                elif reg_no.startswith(compact):
+                    score += 1
+                if score >= self.MIN_SCORE:
+                    results.append((score, student_id))
+
+            results.sort(reverse=True)
+            return [dict(self._docs[student_id], score=round(score, 3))
+                    for score, student_id in results[:limit]]
@@ -74,8 +74,8 @@ def main():
     print("=" * 50)
     print("🎉 Database setup completed!")
     print("\n📋 Next steps:")
-    print("1. Run: python app.py")
-    print("2. The app will create tables automatically")
+    print("1. Run: python migrations.py upgrade")
+    print("2. Run: python app.py")
     print("3. Access: https://localhost:5000")
 
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+import json
+from datetime import date
+from flask import current_app
+
+from resilience import DatabaseUnavailable
+
+
+def verify_pass(qr_data, gate=None, bus=None):
+    """Check a scanned QR payload and return the result sent to the scanner"""
+    # Parse QR code data
+    student_data = json.loads(qr_data)
+    reg_no = student_data.get('reg_no')
+
+    # Verify student in database, or in the last known snapshot while it is failing
+    try:
+        student, stale = current_app.extensions['pass_lookup'].find(reg_no)
+    except DatabaseUnavailable:
+        return {
+            'status': 'unavailable',
+            'message': 'Verification is temporarily unavailable, check the pass manually',
+            'stale': True
+        }
+
+    result = check_pass(student, student_data, gate, bus)
+    if stale:
+        result['stale'] = True
+    return result
+
+
+def check_pass(student, student_data, gate, bus):
+    """Apply the pass rules to a looked-up PassRecord"""
+    problem = pass_problem(student, student_data, date.today())
+    if problem:
+        return problem
+
+    # Scanners on a bus report its number; the pass must be for that bus or its route
+    occupancy = current_app.extensions['occupancy']
+    bus_info = None
+    bus_unchecked = False
+    if bus:
+        try:
+            bus_info = occupancy.bus(bus)
+        except DatabaseUnavailable:
+            # Without the bus directory the pass itself is still checked
+            bus_unchecked = True
+        else:
+            if bus_info is None:
+                return {
+                    'status': 'unknown_bus',
+                    'message': f'Bus {bus} is not registered, check the scanner setup'
+                }
+    if bus_info:
+        bus_id, route_id = bus_info
+        wrong_bus = student.bus_id is not None and student.bus_id != bus_id
+        wrong_route = student.route_id is not None and student.route_id != route_id
+        if wrong_bus or wrong_route:
+            return {
+                'status': 'wrong_bus',
+                'message': 'This pass is not valid on this bus'
+            }
+
+    anti_passback = current_app.extensions.get('anti_passback')
+    duplicate = anti_passback.check(student.reg_no, gate) if anti_passback is not None else None
+    if duplicate:
+        elapsed, last_gate = duplicate
+        where = f" at gate {last_gate}" if last_gate else ""
+        result = {
+            'status': 'duplicate',
+            'message': f'Pass already used{where} {int(elapsed // 60)} min ago'
+        }
+    else:
+        if bus_info:
+            occupancy.record(bus_info[0])
+        result = valid_result(student)
+
+    if bus_unchecked:
+        result['stale'] = True
+    return result
+
+
+def pass_problem(student, student_data, on_date):
+    """Return the rejection for a pass on a given day, or None if it may travel.
+
+    Only the validity dates are judged as of on_date. Revocation and the QR
+    token are checked against the pass as it is now, since their history is
+    not kept; a scan uploaded later from an offline scanner is rejected if the
+    pass was revoked or rotated twice since it was taken.
+    """
+    if not student:
+        return {
+            'status': 'invalid',
+            'message': 'Invalid or fake pass detected'
+        }
+
+    # Dates come before is_active: the expiry sweeper deactivates expired passes,
+    # and they should still be reported as expired rather than blocked
+    if student.valid_from and on_date < student.valid_from:
+        return {
+            'status': 'not_yet_valid',
+            'message': f'This pass is valid from {student.valid_from:%d %b %Y}'
+        }
+    if student.valid_until and on_date > student.valid_until:
+        return {
+            'status': 'expired',
+            'message': f'This pass expired on {student.valid_until:%d %b %Y}'
+        }
+
+    if not student.is_active:
+        return {
+            'status': 'blocked',
+            'message': 'This pass has been revoked or blocked'
+        }
+
+    # Passes are reissued periodically; only the last two generations scan. A
+    # missing token must not match a previous_pass_token that was never set.
+    accepted = {token for token in (student.pass_token, student.previous_pass_token) if token}
+    if student.pass_token and student_data.get('token') not in accepted:
+        return {
+            'status': 'invalid',
+            'message': 'Outdated pass, please show the current QR code'
+        }
+
+    return None
+
+
+def valid_result(student):
+    return {
+        'status': 'valid',
+        'student': {
+            'reg_no': student.reg_no,
+            'name': student.name,
+            'department': student.department,
+            'year': student.year
+        }
+    }
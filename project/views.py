@@ -0,0 +1,388 @@
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, current_app, abort
+from flask_login import login_user, logout_user, login_required, current_user
+from datetime import date, datetime, timedelta
+import time
+
+from models import db, Student, Admin, Route, Bus
+from forms import (StudentRegistrationForm, StudentLoginForm, AdminLoginForm, AdminRegistrationForm,
+                   RouteForm, BusForm, AssignBusForm, RenewPassesForm)
+from qr_codes import generate_qr_code, new_pass_token
+from queries import admin_login_query, dashboard_students, is_taken, student_login_query
+from verification import verify_pass
+from frame_decoder import DecoderBusy
+from offline_scans import ingest as ingest_offline_scans
+from resilience import DATABASE_ERRORS
+from search_index import IndexNotReady
+
+main = Blueprint('main', __name__)
+
+@main.route('/')
+def index():
+    return render_template('index.html')
+
+@main.route('/login_choice')
+def login_choice():
+    return render_template('login_choice.html')
+
+@main.route('/student_login', methods=['GET', 'POST'])
+def student_login():
+    form = StudentLoginForm()
+    if form.validate_on_submit():
+        student = db.session.execute(student_login_query(form.reg_no.data)).scalar()
+        if student and student.check_password(form.password.data):
+            login_user(student)
+            return redirect(url_for('main.student_dashboard'))
+        flash('Invalid registration number or password', 'error')
+    return render_template('student_login.html', form=form)
+
+@main.route('/admin_login', methods=['GET', 'POST'])
+def admin_login():
+    form = AdminLoginForm()
+    if form.validate_on_submit():
+        admin = db.session.execute(admin_login_query(form.username.data)).scalar()
+        if admin and admin.check_password(form.password.data):
+            login_user(admin)
+            return redirect(url_for('main.admin_dashboard'))
+        flash('Invalid username or password', 'error')
+    return render_template('admin_login.html', form=form)
+
+@main.route('/admin_register', methods=['GET', 'POST'])
+def admin_register():
+    form = AdminRegistrationForm()
+    if form.validate_on_submit():
+        admin = Admin(username=form.username.data)
+        admin.set_password(form.password.data)
+        db.session.add(admin)
+        db.session.commit()
+        flash('Admin registration successful! You can now login.', 'success')
+        return redirect(url_for('main.admin_login'))
+    return render_template('admin_register.html', form=form)
+@main.route('/register', methods=['GET', 'POST'])
+def register():
+    form = StudentRegistrationForm()
+    if form.validate_on_submit():
+        # Check if registration number already exists
+        if is_taken(Student.reg_no, form.reg_no.data):
+            flash('Registration number already exists!', 'error')
+            return render_template('register.html', form=form)
+        
+        student = Student(
+            reg_no=form.reg_no.data,
+            name=form.name.data,
+            department=form.department.data,
+            year=form.year.data
+        )
+        student.set_password(form.password.data)
+        student.pass_token = new_pass_token()
+        student.token_generation = 1
+        student.token_rotated_at = datetime.utcnow()
+        student.valid_from = date.today()
+        student.valid_until = student.valid_from + timedelta(days=current_app.config['PASS_VALIDITY_DAYS'])
+        
+        # Generate QR code
+        qr_filename = generate_qr_code({
+            'reg_no': student.reg_no,
+            'name': student.name,
+            'department': student.department,
+            'year': student.year,
+            'pass_token': student.pass_token,
+            'token_generation': student.token_generation
+        })
+        student.qr_code_path = qr_filename
+        
+        db.session.add(student)
+        db.session.commit()
+        current_app.extensions['search_index'].upsert(student)
+        
+        flash('Registration successful! Your bus pass has been generated.', 'success')
+        return render_template('pass_generated.html', student=student)
+    
+    return render_template('register.html', form=form)
+
+@main.route('/student_dashboard')
+@login_required
+def student_dashboard():
+    if isinstance(current_user, Admin):
+        return redirect(url_for('main.admin_dashboard'))
+    return render_template('student_dashboard.html', student=current_user, today=date.today())
+
+@main.route('/admin_dashboard')
+@login_required
+def admin_dashboard():
+    if not isinstance(current_user, Admin):
+        flash('Access denied! Admin access only.', 'error')
+        return redirect(url_for('main.student_dashboard'))
+    
+    return render_template('admin_dashboard.html', students=dashboard_students())
+
+@main.route('/scan')
+def scan():
+    return render_template('scan.html')
+
+@main.route('/verify', methods=['POST'])
+def verify():
+    try:
+        qr_data = request.json.get('qr_data')
+        if not qr_data:
+            return jsonify({'status': 'error', 'message': 'No QR data provided'})
+        
+        return jsonify(verify_pass(qr_data, gate=request.json.get('gate'), bus=request.json.get('bus')))
+    
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': 'Invalid QR code format'})
+
+@main.route('/verify/health')
+def verify_health():
+    """Circuit breaker and snapshot metrics; needs no login so it works while the database is down"""
+    return jsonify(current_app.extensions['pass_lookup'].metrics())
+
+@main.route('/verify/batch', methods=['POST'])
+def verify_batch():
+    """Record scans a scanner queued while it was offline; safe to retry"""
+    body = request.get_json(silent=True)
+    scans = body.get('scans') if isinstance(body, dict) else None
+    if not isinstance(scans, list) or not scans:
+        return jsonify({'status': 'error', 'message': 'No scans provided'}), 400
+    if len(scans) > current_app.config['OFFLINE_SCAN_BATCH_MAX']:
+        return jsonify({'status': 'error', 'message': 'Too many scans in one batch'}), 400
+    
+    try:
+        results = ingest_offline_scans(scans)
+    except DATABASE_ERRORS:
+        db.session.rollback()
+        return jsonify({'status': 'error', 'message': 'Could not record scans, retry later'}), 503
+    return jsonify({'status': 'ok', 'results': results})
+
+@main.route('/verify/frames', methods=['POST'])
+def verify_frames():
+    """Decode QR codes in frames uploaded by headless gate cameras and verify them"""
+    # Refuse oversized uploads from the header, before the body is parsed
+    if request.content_length and request.content_length > current_app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'status': 'error', 'message': 'Upload too large'}), 413
+    
+    uploads = request.files.getlist('frames')
+    if not uploads:
+        return jsonify({'status': 'error', 'message': 'No frames provided'}), 400
+    if len(uploads) > current_app.config['FRAME_MAX_COUNT']:
+        return jsonify({'status': 'error', 'message': 'Too many frames in one request'}), 400
+    
+    max_bytes = current_app.config['FRAME_MAX_BYTES']
+    frames = []
+    for upload in uploads:
+        data = upload.stream.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            return jsonify({'status': 'error', 'message': f'Frame {upload.filename} is too large'}), 413
+        frames.append(data)
+    
+    started = time.perf_counter()
+    try:
+        decoded = current_app.extensions['frame_decoder'].decode(frames)
+    except DecoderBusy:
+        return jsonify({'status': 'error', 'message': 'Decoder busy, retry shortly'}), 503
+    
+    gate = request.form.get('gate')
+    bus = request.form.get('bus')
+    results = []
+    # Frames of one request usually show the same rider; each pass is verified
+    # once, or anti-passback would answer every frame after the first as duplicate
+    verdicts = {}
+    for upload, (payloads, error, decode_ms) in zip(uploads, decoded):
+        frame = {'filename': upload.filename, 'decode_ms': decode_ms, 'results': []}
+        if error:
+            frame['error'] = error
+        for payload in dict.fromkeys(payloads):
+            if payload not in verdicts:
+                try:
+                    verdicts[payload] = verify_pass(payload, gate=gate, bus=bus)
+                except Exception:
+                    verdicts[payload] = {'status': 'error', 'message': 'Invalid QR code format'}
+            frame['results'].append(verdicts[payload])
+        results.append(frame)
+    
+    return jsonify({
+        'frames': results,
+        'total_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+@main.route('/revoke_pass/<int:student_id>')
+@login_required
+def revoke_pass(student_id):
+    if not isinstance(current_user, Admin):
+        flash('Access denied! Admin access only.', 'error')
+        return redirect(url_for('main.student_dashboard'))
+    
+    student = Student.query.get_or_404(student_id)
+    student.is_active = False
+    # A revoked pass stays revoked through renewals, even if it had expired
+    student.expired_at = None
+    db.session.commit()
+    current_app.extensions['search_index'].upsert(student)
+    flash(f'Pass revoked for {student.name}', 'warning')
+    return redirect(url_for('main.admin_dashboard'))
+
+@main.route('/activate_pass/<int:student_id>')
+@login_required
+def activate_pass(student_id):
+    if not isinstance(current_user, Admin):
+        flash('Access denied! Admin access only.', 'error')
+        return redirect(url_for('main.student_dashboard'))
+    
+    student = Student.query.get_or_404(student_id)
+    student.is_active = True
+    student.expired_at = None
+    db.session.commit()
+    current_app.extensions['search_index'].upsert(student)
+    flash(f'Pass activated for {student.name}', 'success')
+    return redirect(url_for('main.admin_dashboard'))
+
+@main.route('/admin/search')
+@login_required
+def search_students():
+    if not isinstance(current_user, Admin):
+        return jsonify({'status': 'error', 'message': 'Admin access only'}), 403
+    
+    query = request.args.get('q', '')
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    started = time.perf_counter()
+    try:
+        results = current_app.extensions['search_index'].search(query, limit=limit)
+    except IndexNotReady:
+        # The before_request hook has started or is backing off the build
+        return jsonify({'status': 'error', 'message': 'Search is starting up, try again shortly'}), 503
+    return jsonify({
+        'results': results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+@main.route('/admin/buses', methods=['GET', 'POST'])
+@login_required
+def admin_buses():
+    if not isinstance(current_user, Admin):
+        flash('Access denied! Admin access only.', 'error')
+        return redirect(url_for('main.student_dashboard'))
+    
+    route_form = RouteForm(prefix='route')
+    bus_form = BusForm(prefix='bus')
+    assign_form = AssignBusForm(prefix='assign')
+    routes = Route.query.order_by(Route.code).all()
+    buses = Bus.query.order_by(Bus.number).all()
+    bus_form.route_id.choices = [(route.id, f'{route.code} - {route.name}') for route in routes]
+    assign_form.bus_id.choices = [(bus.id, f'{bus.number} ({bus.route.code})') for bus in buses]
+    occupancy = current_app.extensions['occupancy']
+    
+    if route_form.submit.data and route_form.validate_on_submit():
+        db.session.add(Route(code=route_form.code.data, name=route_form.name.data))
+        db.session.commit()
+        flash(f'Route {route_form.code.data} added', 'success')
+        return redirect(url_for('main.admin_buses'))
+    
+    if bus_form.submit.data and bus_form.validate_on_submit():
+        db.session.add(Bus(number=bus_form.number.data, route_id=bus_form.route_id.data,
+                           capacity=bus_form.capacity.data))
+        db.session.commit()
+        occupancy.invalidate()
+        flash(f'Bus {bus_form.number.data} added', 'success')
+        return redirect(url_for('main.admin_buses'))
+    
+    if assign_form.submit.data and assign_form.validate_on_submit():
+        student = Student.query.filter_by(reg_no=assign_form.reg_no.data).first()
+        bus = db.session.get(Bus, assign_form.bus_id.data)
+        student.bus_id = bus.id
+        student.route_id = bus.route_id
+        db.session.commit()
+        flash(f'{student.name} assigned to bus {bus.number}', 'success')
+        return redirect(url_for('main.admin_buses'))
+    
+    pending = occupancy.pending()
+    loads = {bus.id: bus.occupancy + pending.get(bus.id, 0) for bus in buses}
+    return render_template('admin_buses.html', routes=routes, buses=buses, loads=loads,
+                           route_form=route_form, bus_form=bus_form, assign_form=assign_form)
+
+@main.route('/admin/renew', methods=['GET', 'POST'])
+@login_required
+def renew_passes():
+    if not isinstance(current_user, Admin):
+        flash('Access denied! Admin access only.', 'error')
+        return redirect(url_for('main.student_dashboard'))
+    
+    form = RenewPassesForm()
+    if form.validate_on_submit():
+        cohort = (Student.department == form.department.data, Student.year == form.year.data)
+        reactivated = 0
+        if form.reactivate.data:
+            # Only passes the expiry sweeper deactivated; revoked passes stay revoked
+            reactivated = db.session.execute(
+                db.update(Student)
+                .where(*cohort, Student.is_active == False, Student.expired_at.isnot(None))
+                .values(is_active=True, expired_at=None)
+            ).rowcount
+        renewed = db.session.execute(
+            db.update(Student).where(*cohort)
+            .values(valid_from=form.valid_from.data, valid_until=form.valid_until.data)
+        ).rowcount
+        db.session.commit()
+        flash(f'Renewed {renewed} passes until {form.valid_until.data:%d %b %Y}'
+              f' ({reactivated} reactivated)', 'success')
+        return redirect(url_for('main.renew_passes'))
+    
+    return render_template('admin_renew.html', form=form)
+
+@main.route('/admin/occupancy')
+@login_required
+def bus_occupancy():
+    if not isinstance(current_user, Admin):
+        return jsonify({'status': 'error', 'message': 'Admin access only'}), 403
+    
+    pending = current_app.extensions['occupancy'].pending()
+    buses = db.session.execute(
+        db.select(Bus.id, Bus.number, Bus.capacity, Bus.occupancy).order_by(Bus.number)
+    ).all()
+    return jsonify([{
+        'id': bus.id,
+        'number': bus.number,
+        'capacity': bus.capacity,
+        'occupancy': bus.occupancy + pending.get(bus.id, 0)
+    } for bus in buses])
+
+@main.route('/admin/buses/<int:bus_id>/reset')
+@login_required
+def reset_occupancy(bus_id):
+    if not isinstance(current_user, Admin):
+        flash('Access denied! Admin access only.', 'error')
+        return redirect(url_for('main.student_dashboard'))
+    
+    bus = Bus.query.get_or_404(bus_id)
+    current_app.extensions['occupancy'].reset(bus.id)
+    flash(f'Occupancy reset for bus {bus.number}', 'info')
+    return redirect(url_for('main.admin_buses'))
+
+@main.route('/admin/profiles')
+@login_required
+def admin_profiles():
+    if not isinstance(current_user, Admin):
+        flash('Access denied! Admin access only.', 'error')
+        return redirect(url_for('main.student_dashboard'))
+    
+    store = current_app.extensions['profiler'].store
+    reports = store.list() if store else []
+    return render_template('admin_profiles.html', reports=reports, profiling_enabled=store is not None)
+
+@main.route('/admin/profiles/<name>')
+@login_required
+def admin_profile(name):
+    if not isinstance(current_user, Admin):
+        flash('Access denied! Admin access only.', 'error')
+        return redirect(url_for('main.student_dashboard'))
+    
+    store = current_app.extensions['profiler'].store
+    report = store.load(name) if store else None
+    if report is None:
+        abort(404)
+    return render_template('admin_profile.html', report=report, name=name)
+
+@main.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash('You have been logged out successfully.', 'info')
+    return redirect(url_for('main.index'))